@@ -1,10 +1,32 @@
 import logging
+import os
+from functools import partial
+import voluptuous as vol
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
-from .sleepme import SleepMeClient
+from homeassistant.core import HomeAssistant, ServiceCall, SupportsResponse
+from homeassistant.helpers.httpx_client import get_async_client
+from homeassistant.util import dt as dt_util
+from .sleepme_api import SleepMeAPI
 from .update_manager import SleepMeUpdateManager
-from .const import DOMAIN
-from .device_utils import should_create_climate_entity, should_create_tracker_sensors
+from .poll_planner import SleepMePollPlanner
+from .loop_timer import LoopTimer
+from .const import (
+    DOMAIN,
+    CONF_RECORD_TRAFFIC,
+    CASSETTE_DIR,
+    CONF_EXPORT_SNAPSHOTS,
+    EXPORT_DIR,
+    ENTRY_TYPE_FLEET,
+    CONF_SHARED_LIMITER_PATH,
+    CONF_SHARED_LIMITER_QUOTA,
+    CONF_LONG_TERM_STATISTICS,
+    CONF_EXCLUDE_RAW_SENSORS,
+    CONF_NIGHTLY_ANALYTICS,
+    CONF_DEADBAND_PREFIX,
+    CONF_MIN_PUBLISH_INTERVAL_PREFIX,
+    CONF_MAX_PUBLISH_INTERVAL_PREFIX,
+)
+from .device_utils import async_sync_device_metadata, should_create_climate_entity
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -12,12 +34,107 @@ async def async_setup(hass: HomeAssistant, config: dict) -> bool:
     """Set up the SleepMe Thermostat component."""
     _LOGGER.debug("Starting async_setup for SleepMe Thermostat.")
     hass.data.setdefault(DOMAIN, {})
+
+    async def handle_benchmark(call: ServiceCall):
+        """Measure the HA-side cost of a poll cycle across all loaded devices."""
+        from .benchmark import async_run_benchmark
+
+        return await async_run_benchmark(hass, call.data["cycles"], call.data["interval"])
+
+    hass.services.async_register(
+        DOMAIN,
+        "benchmark",
+        handle_benchmark,
+        schema=vol.Schema({
+            vol.Optional("cycles", default=20): vol.All(vol.Coerce(int), vol.Range(min=1, max=1000)),
+            vol.Optional("interval", default=0.1): vol.All(vol.Coerce(float), vol.Range(min=0, max=10)),
+        }),
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    async def handle_memory_benchmark(call: ServiceCall):
+        """Measure the memory each device costs and check it against a budget."""
+        from .benchmark import async_run_memory_benchmark
+
+        return await async_run_memory_benchmark(hass, call.data["budget"] * 1024)
+
+    hass.services.async_register(
+        DOMAIN,
+        "memory_benchmark",
+        handle_memory_benchmark,
+        schema=vol.Schema({
+            vol.Optional("budget", default=256): vol.All(vol.Coerce(int), vol.Range(min=1, max=65536)),
+        }),
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    async def handle_setup_benchmark(call: ServiceCall):
+        """Measure how long setting up a number of entries blocks the event loop."""
+        from .benchmark import async_run_setup_benchmark
+
+        return await async_run_setup_benchmark(hass, call.data["entries"])
+
+    hass.services.async_register(
+        DOMAIN,
+        "setup_benchmark",
+        handle_setup_benchmark,
+        schema=vol.Schema({
+            vol.Optional("entries", default=10): vol.All(vol.Coerce(int), vol.Range(min=1, max=500)),
+        }),
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    async def handle_analytics_benchmark(call: ServiceCall):
+        """Time the nightly analytics over a synthetic backfill of history."""
+        from .benchmark import async_run_analytics_benchmark
+
+        return await async_run_analytics_benchmark(hass, call.data["devices"], call.data["days"])
+
+    hass.services.async_register(
+        DOMAIN,
+        "analytics_benchmark",
+        handle_analytics_benchmark,
+        schema=vol.Schema({
+            vol.Optional("devices", default=10): vol.All(vol.Coerce(int), vol.Range(min=1, max=100)),
+            vol.Optional("days", default=365): vol.All(vol.Coerce(int), vol.Range(min=2, max=3650)),
+        }),
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    async def handle_profile(call: ServiceCall):
+        """Profile the integration's hot paths for a while and keep the result for diagnostics."""
+        from .profiler import async_profile
+
+        return await async_profile(hass, call.data["duration"], call.data["top"])
+
+    hass.services.async_register(
+        DOMAIN,
+        "profile",
+        handle_profile,
+        schema=vol.Schema({
+            vol.Optional("duration", default=60): vol.All(vol.Coerce(float), vol.Range(min=1, max=600)),
+            vol.Optional("top", default=25): vol.All(vol.Coerce(int), vol.Range(min=1, max=200)),
+        }),
+        supports_response=SupportsResponse.OPTIONAL,
+    )
     return True
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up SleepMe Thermostat from a config entry."""
     _LOGGER.debug("Starting async_setup_entry for SleepMe Thermostat.")
+    # Time how long setup holds the event loop, so startup cost can be compared across fleet sizes
+    timer = LoopTimer()
+
+    if entry.data.get("entry_type") == ENTRY_TYPE_FLEET:
+        return await timer.async_run(_async_setup_fleet_entry(hass, entry, timer))
 
+    if not await timer.async_run(_async_setup_device_entry(hass, entry)):
+        return False
+    _record_setup_time(hass, entry.data.get("device_id"), timer)
+    return True
+
+async def _async_setup_device_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Set up an entry for a single device."""
     api_url = entry.data.get("api_url")
     api_token = entry.data.get("api_token")
     device_id = entry.data.get("device_id")
@@ -43,26 +160,80 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         _LOGGER.error("API token or device ID is missing from configuration.")
         return False
 
-    # Initialize the SleepMe client and store it in hass.data for shared access
-    sleepme_controller = SleepMeClient(api_url, api_token, device_id)
-    hass.data[DOMAIN]["sleepme_controller"] = sleepme_controller
+    # Optionally share the token's rate-limit budget with other Home Assistant instances
+    limiter = None
+    if entry.options.get(CONF_SHARED_LIMITER_PATH):
+        from homeassistant.helpers import instance_id
+        from .shared_limiter import SqliteRateLimiter
+
+        limiter = SqliteRateLimiter(
+            entry.options[CONF_SHARED_LIMITER_PATH],
+            api_token,
+            await instance_id.async_get(hass),
+            instance_quota=entry.options.get(CONF_SHARED_LIMITER_QUOTA),
+        )
+        _LOGGER.debug(f"Device {device_id} uses the shared rate limiter at {limiter.path}.")
+
+    # Optionally capture a redacted cassette of this device's polling traffic
+    if entry.options.get(CONF_RECORD_TRAFFIC):
+        from .cassette import RecordingTransport
+
+        # Building a transport loads the SSL context, which blocks
+        recorder = await hass.async_add_executor_job(RecordingTransport)
+        hass.data[DOMAIN][f"{device_id}_recorder"] = recorder
+        api = await hass.async_add_executor_job(partial(SleepMeAPI, api_url, api_token, transport=recorder, limiter=limiter))
+        _LOGGER.info(f"Recording API traffic for device {device_id}.")
+    else:
+        # Home Assistant's shared client already has its SSL context loaded
+        api = SleepMeAPI(api_url, api_token, client=get_async_client(hass), limiter=limiter)
 
     # Create and store the update manager
-    update_manager = SleepMeUpdateManager(hass, api_url, api_token, device_id)
+    update_manager = SleepMeUpdateManager(hass, api_url, api_token, device_id, api=api)
     hass.data[DOMAIN][f"{device_id}_update_manager"] = update_manager
 
-    # Trigger the initial data fetch
+    # Apply the entry's publish filtering options before the entities are created
+    update_manager.deadbands = _options_by_key(entry.options, CONF_DEADBAND_PREFIX)
+    update_manager.min_publish_intervals = _options_by_key(entry.options, CONF_MIN_PUBLISH_INTERVAL_PREFIX)
+    update_manager.max_publish_intervals = _options_by_key(entry.options, CONF_MAX_PUBLISH_INTERVAL_PREFIX)
+
+    # Keep the registry and the stored device information in step with the device's firmware and hardware
+    entry.async_on_unload(
+        update_manager.async_add_metadata_listener(partial(async_sync_device_metadata, hass, device_id, entry=entry))
+    )
+
+    # Restore commands left undelivered before a restart, then trigger the initial data fetch
+    await update_manager.commands.async_load()
     await update_manager.async_config_entry_first_refresh()
 
+    # Spread this device's polls against the other devices on the same token
+    _get_planner(hass, api_token).async_register(update_manager)
+
+    # Optionally export raw snapshots for offline analysis
+    if entry.options.get(CONF_EXPORT_SNAPSHOTS):
+        from .export import SnapshotExporter
+
+        exporter = SnapshotExporter(hass, update_manager, hass.config.path(EXPORT_DIR))
+        exporter.async_start()
+        hass.data[DOMAIN][f"{device_id}_exporter"] = exporter
+
+    # Optionally summarize each night from recorded history; created before the sensors that show it
+    if entry.options.get(CONF_NIGHTLY_ANALYTICS) and "recorder" in hass.config.components:
+        from .analytics import SleepMeNightlyAnalytics
+
+        analytics = SleepMeNightlyAnalytics(hass, device_id, device_type)
+        analytics.async_start()
+        hass.data[DOMAIN][f"{device_id}_analytics"] = analytics
+
     # Store the device information in hass.data for access by platforms
+    # (read again, as the first refresh may have updated the stored values)
     hass.data[DOMAIN]["device_info"] = {
-        "firmware_version": firmware_version,
-        "mac_address": mac_address,
-        "model": model,
-        "serial_number": serial_number,
+        "firmware_version": entry.data.get("firmware_version"),
+        "mac_address": entry.data.get("mac_address"),
+        "model": entry.data.get("model"),
+        "serial_number": entry.data.get("serial_number"),
     }
 
-    _LOGGER.debug(f"SleepMeClient and Update Manager initialized and stored in hass.data for device {device_id}.")
+    _LOGGER.debug(f"Update Manager initialized and stored in hass.data for device {device_id}.")
 
     # Forward to appropriate platforms based on device type
     platforms = ["sensor", "binary_sensor"]  # All devices get sensors and binary_sensors
@@ -73,7 +244,167 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     
     _LOGGER.debug(f"Setting up platforms {platforms} for {device_type} device {device_id}")
     
+    hass.data[DOMAIN][f"{entry.entry_id}_platforms"] = platforms
     await hass.config_entries.async_forward_entry_setups(entry, platforms)
 
+    # Optionally keep noisy readings as aggregated long-term statistics
+    statistics_enabled = entry.options.get(CONF_LONG_TERM_STATISTICS, False) and "recorder" in hass.config.components
+    if statistics_enabled:
+        from .statistics import SleepMeStatisticsAggregator
+
+        aggregator = SleepMeStatisticsAggregator(hass, update_manager, entry.data)
+        await aggregator.async_start()
+        hass.data[DOMAIN][f"{device_id}_statistics"] = aggregator
+    # Raw sensors are only excluded while their statistics are kept and nightly analytics do not read them
+    from .sensor import async_set_raw_sensors_enabled
+
+    async_set_raw_sensors_enabled(
+        hass,
+        entry.entry_id,
+        entry.data,
+        not (
+            statistics_enabled
+            and entry.options.get(CONF_EXCLUDE_RAW_SENSORS)
+            and not entry.options.get(CONF_NIGHTLY_ANALYTICS)
+        ),
+    )
+
+    # Reload when options such as the bed controller pairing change
+    hass.data[DOMAIN][f"{entry.entry_id}_options"] = dict(entry.options)
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+
     _LOGGER.info("SleepMe Thermostat component initialized successfully.")
     return True
+
+async def _async_setup_fleet_entry(hass: HomeAssistant, entry: ConfigEntry, timer: LoopTimer) -> bool:
+    """Set up a fleet entry that manages every device on its token. Its setup time covers the first discovery."""
+    from .fleet import SleepMeFleetManager, FLEET_PLATFORMS
+
+    fleet = SleepMeFleetManager(hass, entry, _get_planner(hass, entry.data.get("api_token")))
+    hass.data[DOMAIN][entry.entry_id] = fleet
+    await fleet.async_setup(on_discovered=partial(_record_setup_time, hass, entry.entry_id, timer), timer=timer)
+
+    _LOGGER.debug(f"Fleet entry {entry.entry_id} set up, its devices are discovered in the background.")
+
+    hass.data[DOMAIN][f"{entry.entry_id}_platforms"] = FLEET_PLATFORMS
+    await hass.config_entries.async_forward_entry_setups(entry, FLEET_PLATFORMS)
+    return True
+
+async def _async_unload_fleet_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Unload a fleet entry and all of its devices."""
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, hass.data[DOMAIN][f"{entry.entry_id}_platforms"])
+    if unload_ok:
+        hass.data[DOMAIN].pop(f"{entry.entry_id}_platforms", None)
+        fleet = hass.data[DOMAIN].pop(entry.entry_id)
+        await fleet.async_unload()
+        hass.data[DOMAIN].get("setup_times", {}).pop(entry.entry_id, None)
+        _drop_empty_planner(hass, entry.data.get("api_token"))
+    return unload_ok
+
+async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Unload a SleepMe Thermostat config entry."""
+    if entry.data.get("entry_type") == ENTRY_TYPE_FLEET:
+        return await _async_unload_fleet_entry(hass, entry)
+
+    device_id = entry.data.get("device_id")
+    platforms = hass.data[DOMAIN].get(f"{entry.entry_id}_platforms", [])
+
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, platforms)
+    if unload_ok:
+        hass.data[DOMAIN].pop(f"{entry.entry_id}_platforms", None)
+        hass.data[DOMAIN].pop(f"{entry.entry_id}_options", None)
+        hass.data[DOMAIN].pop(device_id, None)
+        hass.data[DOMAIN].get("setup_times", {}).pop(device_id, None)
+        update_manager = hass.data[DOMAIN].pop(f"{device_id}_update_manager", None)
+        if update_manager is not None:
+            _unregister_from_planner(hass, entry.data.get("api_token"), update_manager)
+            await update_manager.async_shutdown()
+            await update_manager.client.api.close()
+        aggregator = hass.data[DOMAIN].pop(f"{device_id}_statistics", None)
+        if aggregator is not None:
+            await aggregator.async_stop()
+        exporter = hass.data[DOMAIN].pop(f"{device_id}_exporter", None)
+        if exporter is not None:
+            await exporter.async_stop()
+        analytics = hass.data[DOMAIN].pop(f"{device_id}_analytics", None)
+        if analytics is not None:
+            analytics.async_stop()
+        recorder = hass.data[DOMAIN].pop(f"{device_id}_recorder", None)
+        if recorder is not None:
+            await hass.async_add_executor_job(_save_cassette, hass, device_id, recorder)
+        _LOGGER.debug(f"Unloaded SleepMe Thermostat entry for device {device_id}.")
+
+    return unload_ok
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Delete stored data when an entry is removed."""
+    from homeassistant.helpers import device_registry as dr
+    from homeassistant.helpers.storage import Store
+    from .command_queue import STORAGE_VERSION, storage_key
+
+    device_ids = set()
+    if entry.data.get("entry_type") == ENTRY_TYPE_FLEET:
+        # The fleet's devices are still in the registry; ones shared with their own entry keep their queue
+        registry = dr.async_get(hass)
+        for device_entry in dr.async_entries_for_config_entry(registry, entry.entry_id):
+            if device_entry.config_entries == {entry.entry_id}:
+                device_ids.update(identifier[1] for identifier in device_entry.identifiers if identifier[0] == DOMAIN)
+    elif entry.data.get("device_id"):
+        device_ids.add(entry.data["device_id"])
+
+    for device_id in device_ids:
+        await Store(hass, STORAGE_VERSION, storage_key(device_id)).async_remove()
+
+    if entry.options.get(CONF_LONG_TERM_STATISTICS) and entry.data.get("device_id"):
+        from . import statistics
+
+        await Store(hass, statistics.STORAGE_VERSION, statistics.storage_key(entry.data["device_id"])).async_remove()
+
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload a config entry after its options change."""
+    # Refreshed device metadata also updates the entry, which needs no reload
+    if entry.options == hass.data[DOMAIN].get(f"{entry.entry_id}_options"):
+        return
+    await hass.config_entries.async_reload(entry.entry_id)
+
+def _options_by_key(options: dict, prefix: str) -> dict:
+    """Return the per-sensor options with ``prefix``, keyed by sensor description key."""
+    return {key[len(prefix):]: value for key, value in options.items() if key.startswith(prefix)}
+
+def _get_planner(hass: HomeAssistant, api_token: str) -> SleepMePollPlanner:
+    """Return the poll planner shared by every device on a token."""
+    planners = hass.data[DOMAIN].setdefault("poll_planners", {})
+    planner = planners.get(api_token)
+    if planner is None:
+        planner = planners[api_token] = SleepMePollPlanner(hass)
+    return planner
+
+def _unregister_from_planner(hass: HomeAssistant, api_token: str, update_manager: SleepMeUpdateManager) -> None:
+    """Remove a device from its token's poll plan, dropping the planner once it is empty."""
+    planner = hass.data[DOMAIN].get("poll_planners", {}).get(api_token)
+    if planner is None:
+        return
+    planner.async_unregister(update_manager)
+    _drop_empty_planner(hass, api_token)
+
+def _drop_empty_planner(hass: HomeAssistant, api_token: str) -> None:
+    planners = hass.data[DOMAIN].get("poll_planners", {})
+    planner = planners.get(api_token)
+    if planner is not None and planner.is_empty:
+        planners.pop(api_token)
+
+def _record_setup_time(hass: HomeAssistant, key: str, timer: LoopTimer) -> None:
+    """Keep the wall time of a setup and how long it held the event loop, for the benchmark."""
+    setup_time = timer.as_dict()
+    hass.data[DOMAIN].setdefault("setup_times", {})[key] = setup_time
+    _LOGGER.debug(
+        f"Setup of {key} took {setup_time['wall']:.3f}s wall, "
+        f"blocking the event loop for {1000 * setup_time['blocking']:.1f}ms."
+    )
+
+def _save_cassette(hass: HomeAssistant, device_id: str, recorder) -> None:
+    """Write a recorded cassette to the config directory."""
+    directory = hass.config.path(CASSETTE_DIR)
+    os.makedirs(directory, exist_ok=True)
+    timestamp = dt_util.utcnow().strftime("%Y%m%dT%H%M%S")
+    recorder.save(os.path.join(directory, f"{device_id}_{timestamp}.json"))
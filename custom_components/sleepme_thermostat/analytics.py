@@ -0,0 +1,183 @@
+"""Nightly sleep-environment analytics computed from recorder history with NumPy."""
+import logging
+from datetime import datetime, time, timedelta
+from homeassistant.const import ATTR_UNIT_OF_MEASUREMENT, UnitOfTemperature
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_track_time_change
+from homeassistant.util import dt as dt_util
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+SIGNAL_ANALYTICS_UPDATED = f"{DOMAIN}_analytics_updated_{{}}"
+
+NIGHT_START = time(20, 0)
+NIGHT_END = time(10, 0)
+GRID_STEP = 60  # seconds
+SETPOINT_TOLERANCE = 1.0  # degrees F
+NON_NUMERIC_STATES = ("", "unknown", "unavailable", "None")
+
+# Sensor description keys whose history feeds the metrics, per device type
+SOURCE_KEYS = {
+    "sleep_pad": ("water_temperature", "set_temperature"),
+    "sleep_tracker": ("bed_temperature", "environment_humidity", "environment_temperature"),
+}
+
+def night_window(day_end: datetime) -> tuple:
+    """Return the UTC start and end of the night that ends on ``day_end``'s local date."""
+    end = dt_util.as_local(day_end).replace(hour=NIGHT_END.hour, minute=NIGHT_END.minute, second=0, microsecond=0)
+    start = (end - timedelta(days=1)).replace(hour=NIGHT_START.hour, minute=NIGHT_START.minute)
+    return dt_util.as_utc(start), dt_util.as_utc(end)
+
+def to_columns(rows: list):
+    """Turn compressed recorder rows into sorted timestamp and value arrays."""
+    import numpy as np
+
+    timestamps = np.fromiter((row["lu"] for row in rows), dtype=float, count=len(rows))
+    states = np.asarray([row["s"] for row in rows], dtype="U32")
+    values = np.where(np.isin(states, NON_NUMERIC_STATES), "nan", states).astype(float)
+    order = np.argsort(timestamps, kind="stable")
+    return timestamps[order], values[order]
+
+def sample_on_grid(timestamps, values, grid):
+    """Hold each value until the next change and read it at every grid point."""
+    import numpy as np
+
+    index = np.searchsorted(timestamps, grid, side="right") - 1
+    sampled = np.full(len(grid), np.nan)
+    valid = index >= 0
+    sampled[valid] = values[index[valid]]
+    return sampled
+
+def compute_pad_metrics(water, setpoint, start: float, end: float) -> dict:
+    """Minutes at setpoint, heating toward it and cooling toward it, from (timestamps, values) pairs."""
+    import numpy as np
+
+    grid = np.arange(start, end, GRID_STEP)
+    water_on_grid = sample_on_grid(*water, grid)
+    set_on_grid = sample_on_grid(*setpoint, grid)
+    error = water_on_grid - set_on_grid
+    known = np.isfinite(error)
+    minutes = GRID_STEP / 60
+    return {
+        "time_at_setpoint": round(float(np.count_nonzero(known & (np.abs(error) <= SETPOINT_TOLERANCE)) * minutes), 1),
+        "heating_time": round(float(np.count_nonzero(known & (error < -SETPOINT_TOLERANCE)) * minutes), 1),
+        "cooling_time": round(float(np.count_nonzero(known & (error > SETPOINT_TOLERANCE)) * minutes), 1),
+    }
+
+def compute_tracker_metrics(bed, humidity, room, start: float, end: float) -> dict:
+    """Mean bed and room temperature and the humidity/bed temperature correlation."""
+    import numpy as np
+
+    grid = np.arange(start, end, GRID_STEP)
+    bed_on_grid = sample_on_grid(*bed, grid)
+    humidity_on_grid = sample_on_grid(*humidity, grid)
+    room_on_grid = sample_on_grid(*room, grid)
+
+    both = np.isfinite(bed_on_grid) & np.isfinite(humidity_on_grid)
+    correlation = None
+    if np.count_nonzero(both) > 2 and np.std(bed_on_grid[both]) > 0 and np.std(humidity_on_grid[both]) > 0:
+        correlation = round(float(np.corrcoef(humidity_on_grid[both], bed_on_grid[both])[0, 1]), 3)
+
+    def _mean(values):
+        finite = values[np.isfinite(values)]
+        return round(float(finite.mean()), 1) if finite.size else None
+
+    return {
+        "mean_bed_temperature": _mean(bed_on_grid),
+        "mean_room_temperature": _mean(room_on_grid),
+        "humidity_bed_correlation": correlation,
+    }
+
+def _load_and_compute(hass: HomeAssistant, device_type: str, entity_ids: dict, celsius_keys: set,
+                      start: datetime, end: datetime) -> dict:
+    """Load a night of history in one query and compute the metrics. Runs in the recorder executor.
+
+    States are recorded in the user's unit, so ``celsius_keys`` are converted
+    back to the sensors' native Fahrenheit first.
+    """
+    import numpy as np
+    from homeassistant.components.recorder import history
+
+    states = history.get_significant_states(
+        hass,
+        start,
+        end,
+        list(entity_ids.values()),
+        include_start_time_state=True,
+        significant_changes_only=False,
+        minimal_response=True,
+        no_attributes=True,
+        compressed_state_format=True,
+    )
+    empty = (np.empty(0), np.empty(0))
+    columns = {key: to_columns(states[entity_id]) if states.get(entity_id) else empty for key, entity_id in entity_ids.items()}
+    for key in celsius_keys:
+        timestamps, values = columns[key]
+        columns[key] = (timestamps, values * 9 / 5 + 32)
+
+    if device_type == "sleep_pad":
+        return compute_pad_metrics(columns["water_temperature"], columns["set_temperature"], start.timestamp(), end.timestamp())
+    return compute_tracker_metrics(
+        columns["bed_temperature"], columns["environment_humidity"], columns["environment_temperature"],
+        start.timestamp(), end.timestamp(),
+    )
+
+class SleepMeNightlyAnalytics:
+    """Computes last night's metrics for one device every morning."""
+
+    def __init__(self, hass: HomeAssistant, device_id: str, device_type: str):
+        self.hass = hass
+        self.device_id = device_id
+        self.device_type = device_type
+        self.results = {}
+        self._unsub = None
+
+    @callback
+    def async_start(self) -> None:
+        self._unsub = async_track_time_change(
+            self.hass, self._handle_schedule, hour=NIGHT_END.hour, minute=NIGHT_END.minute + 5, second=0
+        )
+
+    @callback
+    def async_stop(self) -> None:
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+
+    @callback
+    def _handle_schedule(self, now: datetime) -> None:
+        self.hass.async_create_task(self.async_run(now))
+
+    async def async_run(self, now: datetime = None) -> dict:
+        """Compute the metrics for the night that ended most recently before ``now``."""
+        from homeassistant.components.recorder import get_instance
+
+        registry = er.async_get(self.hass)
+        entity_ids = {}
+        for key in SOURCE_KEYS.get(self.device_type, ()):
+            entity_id = registry.async_get_entity_id("sensor", DOMAIN, f"{DOMAIN}_{self.device_id}_{key}")
+            if entity_id is None:
+                _LOGGER.debug(f"[Device {self.device_id}] No {key} sensor, skipping nightly analytics.")
+                return {}
+            entity_ids[key] = entity_id
+        celsius_keys = {
+            key for key, entity_id in entity_ids.items()
+            if (state := self.hass.states.get(entity_id)) is not None
+            and state.attributes.get(ATTR_UNIT_OF_MEASUREMENT) == UnitOfTemperature.CELSIUS
+        }
+
+        now = now or dt_util.utcnow()
+        start, end = night_window(now)
+        if end > now:
+            start, end = start - timedelta(days=1), end - timedelta(days=1)
+
+        self.results = await get_instance(self.hass).async_add_executor_job(
+            _load_and_compute, self.hass, self.device_type, entity_ids, celsius_keys, start, end
+        )
+        self.results["night_end"] = end.isoformat()
+        _LOGGER.debug(f"[Device {self.device_id}] Nightly analytics: {self.results}")
+        async_dispatcher_send(self.hass, SIGNAL_ANALYTICS_UPDATED.format(self.device_id))
+        return self.results
@@ -0,0 +1,84 @@
+"""Closed-loop bed temperature control for a ChiliPad paired with a Sleep Tracker."""
+import logging
+import math
+from .sleepme import round_half_up
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_KP = 1.5  # Water setpoint degrees C per degree C of bed error
+DEFAULT_KI = 0.001  # Water setpoint degrees C per degree C of bed error per second
+DEFAULT_MIN_WRITE_INTERVAL = 300  # seconds
+DEFAULT_DEADBAND = 0.5  # degrees C
+
+def fahrenheit_to_celsius(temp_f):
+    """Convert a Fahrenheit reading to Celsius, passing None through."""
+    if temp_f is None:
+        return None
+    return (temp_f - 32) * 5 / 9
+
+def max_writes_per_hour(min_write_interval: float) -> int:
+    """Return the upper bound on setpoint writes in any one-hour window for a given write interval."""
+    return math.floor(3600 / min_write_interval) + 1
+
+class BedTemperatureController:
+    """PI controller that turns bed temperature error into pad setpoint writes.
+
+    The output is quantized to the pad's 0.5C steps and a write is only
+    requested when the quantized setpoint changes, the bed error is outside
+    the deadband and at least ``min_write_interval`` seconds have passed since
+    the previous write. That bounds the number of API writes per hour to
+    ``max_writes_per_hour(min_write_interval)`` regardless of tracker noise.
+    """
+
+    def __init__(self, min_output: float, max_output: float, kp: float = DEFAULT_KP, ki: float = DEFAULT_KI,
+                 min_write_interval: float = DEFAULT_MIN_WRITE_INTERVAL, deadband: float = DEFAULT_DEADBAND):
+        self.min_output = min_output
+        self.max_output = max_output
+        self.kp = kp
+        self.ki = ki
+        self.min_write_interval = min_write_interval
+        self.deadband = deadband
+        self.integral = 0.0
+        self.last_output = None
+        self.last_write_time = None
+        self._last_sample_time = None
+
+    def reset(self):
+        """Forget accumulated state, e.g. after the target changes or the loop is turned off."""
+        self.integral = 0.0
+        self._last_sample_time = None
+
+    def update(self, target: float, measured: float, now: float, current_setpoint: float = None):
+        """Feed a bed temperature sample and return a new pad setpoint, or None to hold."""
+        if target is None or measured is None:
+            return None
+
+        error = target - measured
+        if self._last_sample_time is not None and abs(error) > self.deadband:
+            dt = max(0.0, now - self._last_sample_time)
+            candidate = self.integral + self.ki * error * dt
+            # Anti-windup: only integrate while the unclamped output stays inside the pad's range
+            if self.min_output <= target + self.kp * error + candidate <= self.max_output:
+                self.integral = candidate
+        self._last_sample_time = now
+
+        if self.last_output is None:
+            self.last_output = current_setpoint
+
+        if abs(error) <= self.deadband:
+            _LOGGER.debug(f"Bed error {error:.2f}C is inside the {self.deadband}C deadband, holding setpoint.")
+            return None
+
+        output = target + self.kp * error + self.integral
+        output = round_half_up(min(self.max_output, max(self.min_output, output)))
+
+        if output == self.last_output:
+            return None
+
+        if self.last_write_time is not None and now - self.last_write_time < self.min_write_interval:
+            _LOGGER.debug(f"Setpoint change to {output}C deferred, last write was {now - self.last_write_time:.0f}s ago.")
+            return None
+
+        self.last_output = output
+        self.last_write_time = now
+        return output
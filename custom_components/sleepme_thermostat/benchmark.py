@@ -0,0 +1,431 @@
+"""On-demand benchmark of coordinator fan-out and entity state computation."""
+import asyncio
+import copy
+import json
+import logging
+import random
+import time
+import tracemalloc
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util import dt as dt_util
+from .const import DOMAIN, API_URL
+from .loop_timer import LoopTimer
+from .sleepme_api import SleepMeAPI
+from .update_manager import SleepMeUpdateManager
+
+_LOGGER = logging.getLogger(__name__)
+
+BENCHMARK_RESULTS_FILE = "sleepme_benchmark.jsonl"
+MEMORY_DEVICE_COUNTS = (1, 10, 100)
+DEFAULT_MEMORY_BUDGET = 256 * 1024  # bytes per device
+ANALYTICS_DROPOUT_RATE = 0.005  # share of recorded states that are "unavailable"
+
+# Status fields that change from poll to poll on a real device
+_VOLATILE_FIELDS = (
+    "water_temperature_f",
+    "water_temperature_c",
+    "water_level",
+    "bed_temperature_f",
+    "environment_temperature_f",
+    "environment_humidity",
+)
+
+def get_update_managers(hass: HomeAssistant) -> list:
+    """Return every loaded SleepMe update manager."""
+    return [
+        value for key, value in hass.data.get(DOMAIN, {}).items()
+        if isinstance(key, str) and key.endswith("_update_manager")
+    ]
+
+def synthetic_snapshot(data: dict, rng: random.Random) -> dict:
+    """Return a copy of a coordinator snapshot with its volatile readings perturbed."""
+    snapshot = copy.deepcopy(data) if data else {"status": {}, "control": {}, "about": {}}
+    status = snapshot.setdefault("status", {})
+    for field in _VOLATILE_FIELDS:
+        value = status.get(field)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            status[field] = round(value + rng.uniform(-1, 1), 1)
+    return snapshot
+
+async def async_run_benchmark(hass: HomeAssistant, cycles: int = 20, interval: float = 0.1) -> dict:
+    """Push synthetic snapshots through stand-in devices and measure the HA-side cost.
+
+    One simulated sleep pad is set up per loaded device, against a stand-in
+    transport that answers from memory, so the live coordinators, the
+    devices, the recorder and any listeners never see the fake readings.
+    The entities compute their state as usual, but their writes are counted
+    instead of reaching the state machine. Each cycle pushes one snapshot to
+    every device, which is what a poll cycle does on the event loop. Fan-out
+    is synchronous, so its wall time is time the loop was blocked, and its
+    CPU time is measured on the loop's thread only.
+    """
+    from .binary_sensor import _build_binary_sensors
+    from .climate import _build_thermostats
+    from .sensor import _build_sensors
+
+    count = len(get_update_managers(hass))
+    if not count:
+        return {"devices": 0, "cycles": 0}
+
+    device_ids = [f"bench-{index:04d}" for index in range(count)]
+    stand_in = _stand_in_client(device_ids)
+    managers = [
+        SleepMeUpdateManager(hass, API_URL, "benchmark", device_id, api=SleepMeAPI(API_URL, "benchmark", client=stand_in))
+        for device_id in device_ids
+    ]
+    for manager in managers:
+        # Only the pushed snapshots may reach the entities, never a scheduled poll of the stand-in
+        manager.update_interval = None
+    entities = []
+    state_writes = 0
+
+    def _counting_write(entity):
+        @callback
+        def _write() -> None:
+            nonlocal state_writes
+            # The work a real write does before the state machine: computing state and attributes
+            entity.state
+            entity.state_attributes
+            entity.extra_state_attributes
+            state_writes += 1
+        return _write
+
+    rng = random.Random(0)
+    cpu_times = []
+    blocking_times = []
+    writes_per_cycle = []
+    unsubs = []
+    try:
+        for manager in managers:
+            await manager.async_refresh()
+            device_data = {"device_id": manager.device_id, "name": manager.device_id, "device_type": "sleep_pad"}
+            device_data.update(manager.metadata)
+            for build in (_build_sensors, _build_binary_sensors, _build_thermostats):
+                for entity in build(hass, manager, device_data):
+                    entity.hass = hass
+                    entity.async_write_ha_state = _counting_write(entity)
+                    unsubs.append(manager.async_add_listener(entity._handle_coordinator_update))
+                    entities.append(entity)
+        originals = {manager: manager.data for manager in managers}
+
+        for _ in range(cycles):
+            snapshots = [(manager, synthetic_snapshot(originals[manager], rng)) for manager in managers]
+            state_writes = 0
+
+            cpu_start = time.thread_time()
+            wall_start = time.perf_counter()
+            for manager, snapshot in snapshots:
+                manager.async_set_updated_data(snapshot)
+            blocking_times.append(time.perf_counter() - wall_start)
+            cpu_times.append(time.thread_time() - cpu_start)
+            writes_per_cycle.append(state_writes)
+
+            await asyncio.sleep(interval)
+    finally:
+        while unsubs:
+            unsubs.pop()()
+        for manager in managers:
+            await manager.async_shutdown()
+        for device_id in device_ids:
+            hass.data[DOMAIN].pop(device_id, None)
+        await stand_in.aclose()
+
+    result = {
+        "timestamp": dt_util.utcnow().isoformat(),
+        "devices": count,
+        "entities": len(entities),
+        "cycles": cycles,
+        "cpu_per_cycle_ms": round(1000 * sum(cpu_times) / cycles, 3),
+        "cpu_per_device_ms": round(1000 * sum(cpu_times) / cycles / count, 3),
+        "cpu_max_cycle_ms": round(1000 * max(cpu_times), 3),
+        "blocking_per_cycle_ms": round(1000 * sum(blocking_times) / cycles, 3),
+        "blocking_max_cycle_ms": round(1000 * max(blocking_times), 3),
+        "state_writes_per_cycle": round(sum(writes_per_cycle) / cycles, 2),
+    }
+    _LOGGER.info(f"SleepMe benchmark: {result}")
+
+    await hass.async_add_executor_job(_append_result, hass.config.path(BENCHMARK_RESULTS_FILE), result)
+    return result
+
+def _append_result(path: str, result: dict) -> None:
+    """Append a benchmark result so runs can be compared over time."""
+    with open(path, "a", encoding="utf-8") as file:
+        file.write(json.dumps(result) + "\n")
+
+def _stand_in_status(device_id: str, index: int) -> dict:
+    """Return a device status shaped like the API's, for the stand-in transport."""
+    return {
+        "about": {
+            "firmware_version": "5.39.2134",
+            "ip_address": f"10.0.{index // 250}.{index % 250}",
+            "lan_address": f"10.0.{index // 250}.{index % 250}",
+            "mac_address": f"02:00:00:00:{index // 256:02x}:{index % 256:02x}",
+            "model": "DP999NA",
+            "serial_number": f"BENCH{index:06d}",
+        },
+        "control": {
+            "brightness_level": 100,
+            "display_temperature_unit": "f",
+            "set_temperature_c": 21.5,
+            "set_temperature_f": 71,
+            "thermal_control_status": "active",
+            "time_zone": "America/New_York",
+        },
+        "status": {
+            "is_connected": True,
+            "is_water_low": False,
+            "water_level": 100,
+            "water_temperature_c": 22.0,
+            "water_temperature_f": 72,
+        },
+    }
+
+def _stand_in_client(device_ids: list):
+    """Return an HTTP client that answers every device's status request from memory."""
+    import httpx
+    from .cassette import ReplayTransport
+
+    interactions = [
+        {"method": "GET", "path": f"/v1/devices/{device_id}", "status": 200, "latency": 0,
+         "response": _stand_in_status(device_id, index)}
+        for index, device_id in enumerate(device_ids)
+    ]
+    # Stands in for Home Assistant's shared client, which every device uses
+    return httpx.AsyncClient(transport=ReplayTransport(interactions))
+
+async def _async_set_up_stand_in(hass: HomeAssistant, device_id: str, stand_in) -> tuple:
+    """Set up one simulated sleep pad the way a standalone entry does. Returns its manager and entities."""
+    from .binary_sensor import _build_binary_sensors
+    from .climate import _build_thermostats
+    from .sensor import _build_sensors
+
+    api = SleepMeAPI(API_URL, "benchmark", client=stand_in)
+    manager = SleepMeUpdateManager(hass, API_URL, "benchmark", device_id, api=api)
+    manager.update_interval = None
+    await manager.commands.async_load()
+    await manager.async_refresh()
+    device_data = {"device_id": device_id, "name": device_id, "device_type": "sleep_pad", **manager.metadata}
+    entities = []
+    for build in (_build_sensors, _build_binary_sensors, _build_thermostats):
+        entities.extend(build(hass, manager, device_data))
+    return manager, entities
+
+async def async_run_setup_benchmark(hass: HomeAssistant, entries: int = 10) -> dict:
+    """Set up simulated entries at once and measure how long they block the event loop.
+
+    Each entry sets up one simulated sleep pad against a stand-in transport
+    that answers from memory, concurrently as Home Assistant sets up entries
+    at startup. Every step an entry's setup runs between two awaits is timed,
+    so the blocking time is what that setup cost the loop, not time spent
+    waiting or running other tasks. The recorded setup times of the loaded
+    entries are reported alongside.
+    """
+    device_ids = [f"bench-{index:04d}" for index in range(entries)]
+    stand_in = _stand_in_client(device_ids)
+    timers = [LoopTimer() for _ in device_ids]
+    set_up = []
+
+    started = time.perf_counter()
+    try:
+        results = await asyncio.gather(
+            *(timer.async_run(_async_set_up_stand_in(hass, device_id, stand_in)) for timer, device_id in zip(timers, device_ids)),
+            return_exceptions=True,
+        )
+        wall = time.perf_counter() - started
+        set_up = [result for result in results if not isinstance(result, BaseException)]
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            raise HomeAssistantError(f"{len(errors)} simulated entries failed to set up: {errors[0]!r}")
+    finally:
+        for manager, _entities in set_up:
+            await manager.async_shutdown()
+        for device_id in device_ids:
+            hass.data[DOMAIN].pop(device_id, None)
+        await stand_in.aclose()
+
+    blocking = [timer.blocking for timer in timers]
+    result = {
+        "timestamp": dt_util.utcnow().isoformat(),
+        "entries": entries,
+        "entities": sum(len(entities) for _manager, entities in set_up),
+        "wall_s": round(wall, 3),
+        "blocking_total_ms": round(1000 * sum(blocking), 3),
+        "blocking_per_entry_ms": round(1000 * sum(blocking) / entries, 3),
+        "blocking_max_entry_ms": round(1000 * max(blocking), 3),
+        "blocking_max_step_ms": round(1000 * max(timer.max_step for timer in timers), 3),
+    }
+
+    # Startup cost of the entries that are loaded, recorded by async_setup_entry
+    setup_times = hass.data[DOMAIN].get("setup_times", {})
+    if setup_times:
+        result["loaded_entries"] = len(setup_times)
+        result["loaded_wall_max_s"] = round(max(t["wall"] for t in setup_times.values()), 3)
+        result["loaded_blocking_total_ms"] = round(1000 * sum(t["blocking"] for t in setup_times.values()), 3)
+        result["loaded_blocking_max_step_ms"] = round(1000 * max(t["max_step"] for t in setup_times.values()), 3)
+    _LOGGER.info(f"SleepMe setup benchmark: {result}")
+
+    await hass.async_add_executor_job(_append_result, hass.config.path(BENCHMARK_RESULTS_FILE), result)
+    return result
+
+async def _async_measure_devices(hass: HomeAssistant, count: int) -> dict:
+    """Set up simulated devices phase by phase and return the bytes each phase allocated."""
+    from .binary_sensor import _build_binary_sensors
+    from .climate import _build_thermostats
+    from .sensor import _build_sensors
+
+    device_ids = [f"bench-{index:04d}" for index in range(count)]
+    stand_in = _stand_in_client(device_ids)
+    managers = []
+    entities = []
+
+    try:
+        before = tracemalloc.take_snapshot()
+        apis = [SleepMeAPI(API_URL, "benchmark", client=stand_in) for _ in device_ids]
+        managers = [
+            SleepMeUpdateManager(hass, API_URL, "benchmark", device_id, api=api)
+            for device_id, api in zip(device_ids, apis)
+        ]
+        after_clients = tracemalloc.take_snapshot()
+
+        for manager in managers:
+            await manager.async_refresh()
+        after_snapshots = tracemalloc.take_snapshot()
+
+        for manager in managers:
+            device_data = {"device_id": manager.device_id, "name": manager.device_id, "device_type": "sleep_pad"}
+            device_data.update(manager.metadata)
+            for build in (_build_sensors, _build_binary_sensors, _build_thermostats):
+                entities.extend(build(hass, manager, device_data))
+        after_entities = tracemalloc.take_snapshot()
+    finally:
+        for manager in managers:
+            await manager.async_shutdown()
+        for device_id in device_ids:
+            hass.data[DOMAIN].pop(device_id, None)
+        await stand_in.aclose()
+
+    def _growth(newer, older):
+        return sum(stat.size_diff for stat in newer.compare_to(older, "filename"))
+
+    clients = _growth(after_clients, before)
+    snapshots = _growth(after_snapshots, after_clients)
+    entity_bytes = _growth(after_entities, after_snapshots)
+    return {
+        "devices": count,
+        "entities": len(entities),
+        "client_bytes_per_device": clients // count,
+        "coordinator_bytes_per_device": snapshots // count,
+        "entity_bytes_per_device": entity_bytes // count,
+        "total_bytes_per_device": (clients + snapshots + entity_bytes) // count,
+    }
+
+async def async_run_memory_benchmark(hass: HomeAssistant, budget: int = DEFAULT_MEMORY_BUDGET,
+                                     device_counts=MEMORY_DEVICE_COUNTS) -> dict:
+    """Measure what each additional device costs in memory and fail if it exceeds the budget.
+
+    Simulated sleep pads are set up the way a standalone entry sets them up,
+    against a stand-in transport that answers from memory. tracemalloc
+    attributes the growth to the clients, the update manager and its first
+    snapshot, and the entities.
+    """
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    try:
+        runs = [await _async_measure_devices(hass, count) for count in device_counts]
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+
+    result = {
+        "timestamp": dt_util.utcnow().isoformat(),
+        "budget_bytes_per_device": budget,
+        "runs": runs,
+    }
+    _LOGGER.info(f"SleepMe memory benchmark: {result}")
+    await hass.async_add_executor_job(_append_result, hass.config.path(BENCHMARK_RESULTS_FILE), result)
+
+    worst = max(run["total_bytes_per_device"] for run in runs)
+    if worst > budget:
+        raise HomeAssistantError(f"SleepMe devices use {worst} bytes each, over the budget of {budget} bytes.")
+    return result
+
+def _compressed_rows(timestamps, values, rng) -> list:
+    """Shape readings like the recorder's compressed states: a row per change, with the state as a string."""
+    import numpy as np
+
+    values = np.round(values, 1)
+    changed = np.flatnonzero(np.diff(values, prepend=np.nan) != 0)
+    states = values[changed].astype("U32")
+    states[rng.random(changed.size) < ANALYTICS_DROPOUT_RATE] = "unavailable"
+    return [{"s": state, "lu": lu} for state, lu in zip(states.tolist(), timestamps[changed].tolist())]
+
+def _run_analytics_backfill(devices: int, days: int, seed: int) -> dict:
+    """Parse and compute every night of ``days`` of minute readings for each device. Runs in the executor."""
+    import numpy as np
+    from .analytics import compute_pad_metrics, compute_tracker_metrics, to_columns
+
+    rng = np.random.default_rng(seed)
+    start = time.time() - days * 86400
+    timestamps = start + np.arange(days * 1440) * 60.0
+    generate_wall = 0.0
+    parse_wall = 0.0
+    compute_wall = 0.0
+    row_count = 0
+    for _ in range(devices):
+        began = time.perf_counter()
+        setpoint = np.repeat(rng.choice([64.0, 68.0, 72.0], size=days * 24), 60)
+        series = {
+            "setpoint": setpoint,
+            "water": setpoint + np.cumsum(rng.normal(0, 0.05, size=timestamps.size)).clip(-4, 4),
+            "bed": 80 + rng.normal(0, 1.0, size=timestamps.size),
+            "room": 68 + rng.normal(0, 0.5, size=timestamps.size),
+        }
+        series["humidity"] = 45 + 0.8 * (series["bed"] - 80) + rng.normal(0, 0.5, size=timestamps.size)
+        generate_wall += time.perf_counter() - began
+
+        for night in range(days - 1):
+            night_start = start + night * 86400 + 20 * 3600
+            night_end = night_start + 14 * 3600
+            window = slice(*np.searchsorted(timestamps, (night_start, night_end)))
+
+            # What get_significant_states returns for the night
+            began = time.perf_counter()
+            rows = {key: _compressed_rows(timestamps[window], values[window], rng) for key, values in series.items()}
+            generate_wall += time.perf_counter() - began
+            row_count += sum(len(entity_rows) for entity_rows in rows.values())
+
+            began = time.perf_counter()
+            columns = {key: to_columns(entity_rows) for key, entity_rows in rows.items()}
+            parse_wall += time.perf_counter() - began
+
+            began = time.perf_counter()
+            compute_pad_metrics(columns["water"], columns["setpoint"], night_start, night_end)
+            compute_tracker_metrics(columns["bed"], columns["humidity"], columns["room"], night_start, night_end)
+            compute_wall += time.perf_counter() - began
+
+    nights = devices * (days - 1)
+    return {
+        "devices": devices,
+        "days": days,
+        "rows": row_count,
+        "generate_wall_s": round(generate_wall, 3),
+        "parse_wall_s": round(parse_wall, 3),
+        "compute_wall_s": round(compute_wall, 3),
+        "per_night_ms": round((parse_wall + compute_wall) / nights * 1000, 3) if nights else None,
+    }
+
+async def async_run_analytics_benchmark(hass: HomeAssistant, devices: int = 10, days: int = 365) -> dict:
+    """Time the nightly analytics over a synthetic backfill of minute readings.
+
+    Every night of the backfill is computed the way the nightly job computes
+    one, so the result shows how long recomputing a year of history takes.
+    The readings are generated in memory as the compressed rows the recorder
+    returns, so turning them into columns is timed too; the query is not.
+    """
+    result = await hass.async_add_executor_job(_run_analytics_backfill, devices, days, 0)
+    result["timestamp"] = dt_util.utcnow().isoformat()
+    _LOGGER.info(f"SleepMe analytics benchmark: {result}")
+    await hass.async_add_executor_job(_append_result, hass.config.path(BENCHMARK_RESULTS_FILE), result)
+    return result
@@ -1,95 +1,83 @@
 import logging
-from homeassistant.components.binary_sensor import BinarySensorEntity, BinarySensorDeviceClass
+from dataclasses import dataclass
+from typing import Any, Callable
+from homeassistant.components.binary_sensor import BinarySensorEntity, BinarySensorEntityDescription, BinarySensorDeviceClass
 from homeassistant.helpers.entity import EntityCategory
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from .const import DOMAIN
+from .const import DOMAIN, ENTRY_TYPE_FLEET
+from .entity import SleepMeEntity, build_device_info
 
 _LOGGER = logging.getLogger(__name__)
 
+@dataclass(frozen=True, kw_only=True)
+class SleepMeBinarySensorEntityDescription(BinarySensorEntityDescription):
+    """Describes a SleepMe binary sensor as a field of the device snapshot."""
+
+    section: str
+    field: str
+    value_fn: Callable[[Any], Any] | None = bool
+    device_types: tuple = ("sleep_pad", "sleep_tracker")
+
+BINARY_SENSOR_DESCRIPTIONS: tuple[SleepMeBinarySensorEntityDescription, ...] = (
+    # Common binary sensors
+    SleepMeBinarySensorEntityDescription(
+        key="connected",
+        name="Connected",
+        device_class=BinarySensorDeviceClass.CONNECTIVITY,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        section="status",
+        field="is_connected",
+    ),
+    # Sleep pad specific binary sensors
+    SleepMeBinarySensorEntityDescription(
+        key="water_low",
+        name="Water Level Low",
+        device_class=BinarySensorDeviceClass.PROBLEM,
+        section="status",
+        field="is_water_low",
+        device_types=("sleep_pad",),
+    ),
+    # Sleep tracker specific binary sensors
+    SleepMeBinarySensorEntityDescription(
+        key="user_detected",
+        name="User Detected",
+        device_class=BinarySensorDeviceClass.OCCUPANCY,
+        section="status",
+        field="user_detected",
+        device_types=("sleep_tracker",),
+    ),
+)
+
 async def async_setup_entry(hass, entry, async_add_entities):
     """Set up SleepMe binary sensors from a config entry."""
+    if entry.data.get("entry_type") == ENTRY_TYPE_FLEET:
+        # Fleet entries add binary sensors per device as devices are discovered
+        hass.data[DOMAIN][entry.entry_id].async_register_platform("binary_sensor", _build_binary_sensors, async_add_entities)
+        return
+
     device_id = entry.data.get("device_id")
-    name = entry.data.get("name")
-    device_type = entry.data.get("device_type", "sleep_pad")
     coordinator = hass.data[DOMAIN][f"{device_id}_update_manager"]
+    async_add_entities(_build_binary_sensors(hass, coordinator, entry.data))
 
-    _LOGGER.debug(f"[Device {device_id}] Setting up {device_type} binary sensor platform from config entry.")
+def _build_binary_sensors(hass, coordinator, device_data):
+    """Build the binary sensors for one device."""
+    device_id = device_data.get("device_id")
+    name = device_data.get("name")
+    device_type = device_data.get("device_type", "sleep_pad")
 
-    # Get device info for all sensors
-    device_info = {
-        "identifiers": {(DOMAIN, device_id)},
-        "name": f"{'ChiliPad Pro' if device_type == 'sleep_pad' else 'Sleep Tracker'} {name}",
-        "manufacturer": "SleepMe",
-        "model": entry.data.get("model"),
-        "sw_version": entry.data.get("firmware_version"),
-        "connections": {("mac", entry.data.get("mac_address"))},
-        "serial_number": entry.data.get("serial_number"),
-    }
+    _LOGGER.debug(f"[Device {device_id}] Setting up {device_type} binary sensors.")
 
-    # Common sensors for both device types
+    device_info = build_device_info(device_data)
     sensors = [
-        DeviceConnectedBinarySensor(coordinator, device_info, device_id, name, device_type),
+        SleepMeBinarySensor(coordinator, description, device_info, device_id, name, device_type)
+        for description in BINARY_SENSOR_DESCRIPTIONS
+        if device_type in description.device_types
     ]
 
-    # Device-specific sensors
-    if device_type == "sleep_pad":
-        sensors.append(WaterLevelLowSensor(coordinator, device_info, device_id, name))
-    elif device_type == "sleep_tracker":
-        sensors.append(UserDetectedSensor(coordinator, device_info, device_id, name))
-
     _LOGGER.debug(f"[Device {device_id}] Adding {len(sensors)} binary sensors for {device_type}")
-    async_add_entities(sensors)
-
-# Common binary sensors
-class DeviceConnectedBinarySensor(CoordinatorEntity, BinarySensorEntity):
-    """Representation of a binary sensor that indicates if the device is connected."""
-
-    def __init__(self, coordinator, device_info, device_id, name, device_type):
-        super().__init__(coordinator)
-        self._device_id = device_id
-        self._device_type = device_type
-        device_name = "ChiliPad Pro" if device_type == "sleep_pad" else "Sleep Tracker"
-        self._attr_name = f"{device_name} {name} Connected"
-        self._attr_device_class = BinarySensorDeviceClass.CONNECTIVITY
-        self._attr_unique_id = f"{DOMAIN}_{device_id}_connected"
-        self._attr_entity_category = EntityCategory.DIAGNOSTIC
-        self._attr_device_info = device_info
-
-    @property
-    def is_on(self):
-        """Return true if the device is connected."""
-        return self.coordinator.data.get("status", {}).get("is_connected", False)
-
-# Sleep pad specific binary sensors
-class WaterLevelLowSensor(CoordinatorEntity, BinarySensorEntity):
-    """Representation of a binary sensor that indicates if the water level is low."""
-
-    def __init__(self, coordinator, device_info, device_id, name):
-        super().__init__(coordinator)
-        self._device_id = device_id
-        self._attr_name = f"ChiliPad Pro {name} Water Level Low"
-        self._attr_device_class = BinarySensorDeviceClass.PROBLEM
-        self._attr_unique_id = f"{DOMAIN}_{device_id}_water_low"
-        self._attr_device_info = device_info
-
-    @property
-    def is_on(self):
-        """Return true if the water level is low."""
-        return self.coordinator.data.get("status", {}).get("is_water_low", False)
-
-# Sleep tracker specific binary sensors
-class UserDetectedSensor(CoordinatorEntity, BinarySensorEntity):
-    """Representation of a binary sensor that indicates if a user is detected."""
+    return sensors
 
-    def __init__(self, coordinator, device_info, device_id, name):
-        super().__init__(coordinator)
-        self._device_id = device_id
-        self._attr_name = f"Sleep Tracker {name} User Detected"
-        self._attr_device_class = BinarySensorDeviceClass.OCCUPANCY
-        self._attr_unique_id = f"{DOMAIN}_{device_id}_user_detected"
-        self._attr_device_info = device_info
+class SleepMeBinarySensor(SleepMeEntity, BinarySensorEntity):
+    """A SleepMe binary sensor driven by a SleepMeBinarySensorEntityDescription."""
 
-    @property
-    def is_on(self):
-        """Return true if a user is detected."""
-        return self.coordinator.data.get("status", {}).get("user_detected", False)
+    entity_description: SleepMeBinarySensorEntityDescription
+    _value_attr = "_attr_is_on"
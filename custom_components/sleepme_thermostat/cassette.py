@@ -0,0 +1,152 @@
+"""Record and replay SleepMe API traffic.
+
+A ``RecordingTransport`` wraps the real httpx transport and captures a
+redacted timeline of requests and responses, including status codes and
+latencies. A ``ReplayTransport`` plays such a cassette back against a
+``VirtualClock`` so a night of traffic, 429s and 503s included, can be driven
+through ``SleepMeAPI`` and ``SleepMeUpdateManager`` in milliseconds.
+"""
+import asyncio
+import json
+import logging
+import time
+import httpx
+
+_LOGGER = logging.getLogger(__name__)
+
+CASSETTE_VERSION = 1
+
+# Fields from the "about" block that identify a physical device or network
+REDACTED_FIELDS = {"mac_address", "serial_number", "ip_address", "lan_address"}
+REDACTED = "**REDACTED**"
+
+def redact(value):
+    """Return a copy of a decoded JSON body with identifying fields replaced."""
+    if isinstance(value, dict):
+        return {k: REDACTED if k in REDACTED_FIELDS else redact(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [redact(v) for v in value]
+    return value
+
+def _decode_body(content: bytes):
+    if not content:
+        return None
+    try:
+        return json.loads(content)
+    except ValueError:
+        return content.decode("utf-8", errors="replace")
+
+class VirtualClock:
+    """A clock whose sleeps return immediately after advancing virtual time.
+
+    Pass ``clock.time`` and ``clock.sleep`` to ``SleepMeAPI`` to replay limiter
+    waits and retry backoffs without actually waiting.
+    """
+
+    def __init__(self, start: float = 0.0):
+        self.now = start
+        self.slept = 0.0
+
+    def time(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+    async def sleep(self, seconds: float):
+        self.advance(seconds)
+        self.slept += seconds
+        # Still yield to the loop so concurrent tasks interleave as they would for real
+        await asyncio.sleep(0)
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Transport that forwards to a real transport and records each interaction."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport = None, clock=time.monotonic):
+        self.transport = transport or httpx.AsyncHTTPTransport()
+        self.clock = clock
+        self.start = clock()
+        self.interactions = []
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = self.clock()
+        entry = {
+            "offset": round(started - self.start, 3),
+            "method": request.method,
+            "path": request.url.path,
+            "request": redact(_decode_body(request.content)),
+        }
+        try:
+            response = await self.transport.handle_async_request(request)
+            content = await response.aread()
+        except httpx.TimeoutException:
+            entry.update(latency=round(self.clock() - started, 3), error="timeout")
+            self.interactions.append(entry)
+            raise
+        except httpx.RequestError as err:
+            entry.update(latency=round(self.clock() - started, 3), error=type(err).__name__)
+            self.interactions.append(entry)
+            raise
+
+        entry.update(
+            latency=round(self.clock() - started, 3),
+            status=response.status_code,
+            response=redact(_decode_body(content)),
+        )
+        self.interactions.append(entry)
+        return httpx.Response(response.status_code, headers=response.headers, content=content, request=request)
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+    def save(self, path: str):
+        """Write the cassette to disk. Blocking; run it in an executor."""
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({"version": CASSETTE_VERSION, "interactions": self.interactions}, file, indent=1)
+        _LOGGER.debug(f"Saved {len(self.interactions)} recorded interactions to {path}")
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """Transport that answers requests from a recorded cassette on a virtual clock.
+
+    Interactions are matched in order per method and path. Each reply advances
+    the clock by the recorded latency. Requests with nothing left to replay get
+    a 599 so that over-polling shows up as a failure rather than a hang.
+    """
+
+    def __init__(self, interactions: list, clock: VirtualClock = None):
+        self.clock = clock or VirtualClock()
+        self._queues = {}
+        for entry in interactions:
+            self._queues.setdefault((entry["method"], entry["path"]), []).append(entry)
+        self.request_count = 0
+        self.requests = []
+
+    @classmethod
+    def load(cls, path: str, clock: VirtualClock = None):
+        """Build a replay transport from a cassette file. Blocking."""
+        with open(path, encoding="utf-8") as file:
+            cassette = json.load(file)
+        return cls(cassette["interactions"], clock)
+
+    @property
+    def remaining(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.request_count += 1
+        self.requests.append((self.clock.time(), request.method, request.url.path))
+
+        queue = self._queues.get((request.method, request.url.path))
+        if not queue:
+            _LOGGER.debug(f"No recorded interaction left for {request.method} {request.url.path}")
+            return httpx.Response(599, json={}, request=request)
+
+        entry = queue.pop(0)
+        await self.clock.sleep(entry.get("latency", 0))
+
+        if entry.get("error") == "timeout":
+            raise httpx.ReadTimeout("Replayed timeout", request=request)
+        if entry.get("error"):
+            raise httpx.ConnectError(f"Replayed {entry['error']}", request=request)
+
+        return httpx.Response(entry["status"], json=entry.get("response"), request=request)
@@ -5,22 +5,66 @@ from homeassistant.components.climate.const import (
     ClimateEntityFeature,
 )
 from homeassistant.const import UnitOfTemperature
+from homeassistant.core import callback
+from homeassistant.helpers.restore_state import RestoreEntity
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from .const import DOMAIN
+from homeassistant.util import dt as dt_util
+from .const import (
+    DOMAIN,
+    ENTRY_TYPE_FLEET,
+    CONF_BED_CONTROLLER_TRACKER,
+    CONF_BED_CONTROLLER_MIN_WRITE_INTERVAL,
+    CONF_BED_CONTROLLER_DEADBAND,
+)
+from .device_utils import should_create_climate_entity
+from .bed_controller import (
+    BedTemperatureController,
+    DEFAULT_MIN_WRITE_INTERVAL,
+    DEFAULT_DEADBAND,
+    fahrenheit_to_celsius,
+    max_writes_per_hour,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
 async def async_setup_entry(hass, entry, async_add_entities):
     """Set up SleepMe Thermostat climate entity from a config entry."""
+    if entry.data.get("entry_type") == ENTRY_TYPE_FLEET:
+        # Fleet entries add thermostats per sleep pad as devices are discovered
+        hass.data[DOMAIN][entry.entry_id].async_register_platform("climate", _build_thermostats, async_add_entities)
+        return
+
     device_id = entry.data.get("device_id")
     name = entry.data.get("name")
     coordinator = hass.data[DOMAIN][f"{device_id}_update_manager"]
+    entities = _build_thermostats(hass, coordinator, entry.data)
+
+    tracker_id = entry.options.get(CONF_BED_CONTROLLER_TRACKER)
+    if tracker_id:
+        _LOGGER.debug(f"[Device {device_id}] Setting up bed temperature controller driven by tracker {tracker_id}")
+        entities.append(SleepMeBedController(
+            coordinator,
+            device_id,
+            name,
+            tracker_id,
+            entry.options.get(CONF_BED_CONTROLLER_MIN_WRITE_INTERVAL, DEFAULT_MIN_WRITE_INTERVAL),
+            entry.options.get(CONF_BED_CONTROLLER_DEADBAND, DEFAULT_DEADBAND),
+        ))
+
+    async_add_entities(entities)
+
+def _build_thermostats(hass, coordinator, device_data):
+    """Build the thermostat for one device, if it is a sleep pad."""
+    device_id = device_data.get("device_id")
+    name = device_data.get("name")
+    if not should_create_climate_entity(device_data.get("device_type", "sleep_pad")):
+        return []
 
     _LOGGER.debug(f"[Device {device_id}] Setting up SleepMeThermostat entity with name: {name}")
-    thermostat = SleepMeThermostat(coordinator, device_id, name, entry.data)
+    thermostat = SleepMeThermostat(coordinator, device_id, name, device_data)
 
     hass.data[DOMAIN][device_id] = thermostat
-    async_add_entities([thermostat])
+    return [thermostat]
 
 class SleepMeThermostat(CoordinatorEntity, ClimateEntity):
     def __init__(self, coordinator, device_id, name, device_info):
@@ -86,6 +130,7 @@ class SleepMeThermostat(CoordinatorEntity, ClimateEntity):
         return {
             "is_water_low": self.coordinator.data["status"].get("is_water_low"),
             "is_connected": self.coordinator.data["status"].get("is_connected"),
+            "pending_commands": dict(self.coordinator.commands.pending),
         }
 
     @property
@@ -103,7 +148,7 @@ class SleepMeThermostat(CoordinatorEntity, ClimateEntity):
             return
 
         _LOGGER.info(f"[Device {self._device_id}] Setting target temperature to {target_temp}C")
-        await self.coordinator.client.set_temp_level(target_temp)
+        await self.coordinator.commands.async_send("set_temperature_c", target_temp)
 
         # Update internal state immediately
         self.coordinator.data["control"]["set_temperature_c"] = target_temp
@@ -111,9 +156,9 @@ class SleepMeThermostat(CoordinatorEntity, ClimateEntity):
 
     async def async_set_hvac_mode(self, hvac_mode):
         if hvac_mode == HVACMode.AUTO:
-            await self.coordinator.client.set_device_status("active")
+            await self.coordinator.commands.async_send("thermal_control_status", "active")
         elif hvac_mode == HVACMode.OFF:
-            await self.coordinator.client.set_device_status("standby")
+            await self.coordinator.commands.async_send("thermal_control_status", "standby")
 
         # Update internal state immediately
         self.coordinator.data["control"]["thermal_control_status"] = "active" if hvac_mode == HVACMode.AUTO else "standby"
@@ -134,3 +179,183 @@ class SleepMeThermostat(CoordinatorEntity, ClimateEntity):
         if thermal_control_status == "active":
             return HVACMode.AUTO
         return HVACMode.OFF
+
+
+class SleepMeBedController(CoordinatorEntity, ClimateEntity, RestoreEntity):
+    """Holds a target bed temperature by steering the pad's setpoint from a Sleep Tracker."""
+
+    def __init__(self, coordinator, device_id, name, tracker_id, min_write_interval, deadband):
+        super().__init__(coordinator)
+        self._name = f"Dock Pro {name} Bed Temperature Controller"
+        self._device_id = device_id
+        self._tracker_id = tracker_id
+        self._tracker = None
+        self._tracker_unsub = None
+        self._attr_unique_id = f"{DOMAIN}_{device_id}_bed_controller"
+        self._attr_device_info = {"identifiers": {(DOMAIN, device_id)}}
+        self._hvac_mode = HVACMode.OFF
+        self._target_temperature = None
+        self._controller = BedTemperatureController(
+            self.min_temp,
+            self.max_temp,
+            min_write_interval=min_write_interval,
+            deadband=deadband,
+        )
+
+    @property
+    def min_temp(self):
+        return 12.5
+
+    @property
+    def max_temp(self):
+        return 46.5
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def temperature_unit(self):
+        return UnitOfTemperature.CELSIUS
+
+    @property
+    def target_temperature_step(self):
+        return 0.5
+
+    @property
+    def current_temperature(self):
+        tracker = self._tracker_coordinator()
+        if tracker is None or not tracker.data:
+            return None
+        bed_temp_c = fahrenheit_to_celsius(tracker.data.get("status", {}).get("bed_temperature_f"))
+        return round(bed_temp_c, 1) if bed_temp_c is not None else None
+
+    @property
+    def target_temperature(self):
+        return self._target_temperature
+
+    @property
+    def hvac_mode(self):
+        return self._hvac_mode
+
+    @property
+    def hvac_modes(self):
+        return [HVACMode.OFF, HVACMode.AUTO]
+
+    @property
+    def supported_features(self):
+        return (
+            ClimateEntityFeature.TARGET_TEMPERATURE |
+            ClimateEntityFeature.TURN_ON |
+            ClimateEntityFeature.TURN_OFF
+        )
+
+    @property
+    def extra_state_attributes(self):
+        return {
+            "tracker_device_id": self._tracker_id,
+            "pad_setpoint": self.coordinator.data["control"].get("set_temperature_c"),
+            "integral": round(self._controller.integral, 2),
+            "min_write_interval": self._controller.min_write_interval,
+            "deadband": self._controller.deadband,
+            "max_writes_per_hour": max_writes_per_hour(self._controller.min_write_interval),
+        }
+
+    @property
+    def available(self):
+        """Return True if both the pad and the tracker are reporting."""
+        tracker = self._tracker_coordinator()
+        # The tracker's update manager is registered before its first refresh
+        if tracker is None or not tracker.data:
+            return False
+        return (
+            self.coordinator.data["status"].get("is_connected", False)
+            and tracker.data.get("status", {}).get("is_connected", False)
+        )
+
+    async def async_added_to_hass(self):
+        await super().async_added_to_hass()
+
+        last_state = await self.async_get_last_state()
+        if last_state is not None:
+            if last_state.state == HVACMode.AUTO:
+                self._hvac_mode = HVACMode.AUTO
+            self._target_temperature = last_state.attributes.get("temperature")
+
+        self._subscribe_tracker()
+
+    async def async_will_remove_from_hass(self):
+        self._unsubscribe_tracker()
+        await super().async_will_remove_from_hass()
+
+    async def async_set_temperature(self, **kwargs):
+        target_temp = kwargs.get("temperature")
+        if target_temp is None:
+            raise ValueError("Temperature is required")
+
+        _LOGGER.info(f"[Device {self._device_id}] Setting target bed temperature to {target_temp}C")
+        self._target_temperature = target_temp
+        self._controller.reset()
+        self.async_write_ha_state()
+        await self._async_run_controller()
+
+    async def async_set_hvac_mode(self, hvac_mode):
+        self._hvac_mode = hvac_mode
+        self._controller.reset()
+        self.async_write_ha_state()
+        if hvac_mode == HVACMode.AUTO:
+            await self._async_run_controller()
+
+    def _tracker_coordinator(self):
+        return self.hass.data[DOMAIN].get(f"{self._tracker_id}_update_manager") if self.hass else None
+
+    def _subscribe_tracker(self):
+        """Listen to the tracker's current coordinator, following it when the tracker entry reloads."""
+        tracker = self._tracker_coordinator()
+        if tracker is self._tracker:
+            return
+        # A listener keeps a coordinator polling, so let go of one that was unloaded
+        self._unsubscribe_tracker()
+        if tracker is None:
+            _LOGGER.debug(f"[Device {self._device_id}] Tracker {self._tracker_id} is not loaded.")
+            return
+        self._tracker = tracker
+        self._tracker_unsub = tracker.async_add_listener(self._handle_tracker_update)
+
+    def _unsubscribe_tracker(self):
+        if self._tracker_unsub is not None:
+            self._tracker_unsub()
+        self._tracker = None
+        self._tracker_unsub = None
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        # The tracker entry may have been loaded, reloaded or unloaded since the last update
+        self._subscribe_tracker()
+        super()._handle_coordinator_update()
+
+    @callback
+    def _handle_tracker_update(self) -> None:
+        self.async_write_ha_state()
+        self.hass.async_create_task(self._async_run_controller())
+
+    async def _async_run_controller(self):
+        """Run one controller step and write the pad setpoint if the controller asks for it."""
+        if self._hvac_mode != HVACMode.AUTO or not self.available:
+            return
+
+        setpoint = self._controller.update(
+            self._target_temperature,
+            self.current_temperature,
+            dt_util.utcnow().timestamp(),
+            current_setpoint=self.coordinator.data["control"].get("set_temperature_c"),
+        )
+        if setpoint is None:
+            return
+
+        _LOGGER.info(f"[Device {self._device_id}] Bed controller setting pad temperature to {setpoint}C")
+        await self.coordinator.commands.async_send("set_temperature_c", setpoint)
+
+        # Update the pad's state immediately, as the thermostat does
+        self.coordinator.data["control"]["set_temperature_c"] = setpoint
+        self.coordinator.async_update_listeners()
@@ -0,0 +1,116 @@
+"""Durable queue of device commands that could not be delivered."""
+import asyncio
+import httpx
+import logging
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+
+def storage_key(device_id: str) -> str:
+    return f"{DOMAIN}.commands.{device_id}"
+
+class SleepMeCommandQueue:
+    """Sends commands to a device and keeps the ones that fail until they can be replayed.
+
+    The queue holds at most one value per field, the latest one, so after an
+    outage only the final desired state is sent, not every intermediate
+    change. It is persisted, so pending commands survive a restart. Replays
+    go through the device's ``SleepMeAPI`` like any other request, so they
+    stay within its rate limit.
+
+    Sends are not serialized, so one command's retries never hold up another.
+    Each send takes a sequence number per field instead, and only the newest
+    send for a field may queue or clear it.
+    """
+
+    def __init__(self, hass: HomeAssistant, client, device_id: str):
+        self.client = client
+        self.device_id = device_id
+        self.pending = {}
+        self._sequence = {}
+        self._store = Store(hass, STORAGE_VERSION, storage_key(device_id))
+        self._lock = asyncio.Lock()
+        self._senders = {
+            "set_temperature_c": client.set_temp_level,
+            "thermal_control_status": client.set_device_status,
+        }
+
+    async def async_load(self) -> None:
+        """Restore commands that were still pending when Home Assistant stopped."""
+        stored = await self._store.async_load()
+        if stored:
+            self.pending = stored.get("pending", {})
+            _LOGGER.info(f"[Device {self.device_id}] Restored pending commands: {self.pending}")
+
+    async def _async_save(self) -> None:
+        await self._store.async_save({"pending": self.pending})
+
+    async def _async_deliver(self, field: str, value, retries: int) -> dict:
+        """Send one command. Returns an empty response if the API could not be reached.
+
+        An invalid token is raised, as replaying cannot fix it.
+        """
+        try:
+            return await self._senders[field](value, retries=retries)
+        except ValueError as err:
+            if str(err) != "cannot_connect":
+                raise
+            _LOGGER.debug(f"[Device {self.device_id}] Could not connect to send {field}={value}.")
+        except httpx.HTTPStatusError as err:
+            if err.response.status_code < 500:
+                raise
+            _LOGGER.debug(f"[Device {self.device_id}] Server error {err.response.status_code} sending {field}={value}.")
+        except httpx.RequestError as err:
+            _LOGGER.debug(f"[Device {self.device_id}] Request error sending {field}={value}: {err}")
+        return {}
+
+    def _next_sequence(self, field: str) -> int:
+        self._sequence[field] = self._sequence.get(field, 0) + 1
+        return self._sequence[field]
+
+    async def async_send(self, field: str, value, retries: int = 2) -> bool:
+        """Send a command, queueing it if the device cannot be reached. Returns True if it was delivered."""
+        sequence = self._next_sequence(field)
+        response = await self._async_deliver(field, value, retries)
+        if self._sequence[field] != sequence:
+            # A newer value for this field was sent meanwhile and decides what stays queued
+            return bool(response)
+
+        if response:
+            if self.pending.pop(field, None) is not None:
+                await self._async_save()
+            return True
+
+        _LOGGER.warning(f"[Device {self.device_id}] Queued {field}={value} until the SleepMe API is reachable again.")
+        self.pending[field] = value
+        await self._async_save()
+        return False
+
+    async def async_replay(self) -> dict:
+        """Try to deliver the pending commands, stopping at the first failure. Returns the delivered values."""
+        delivered = {}
+        if self._lock.locked():
+            return delivered
+        async with self._lock:
+            for field, value in list(self.pending.items()):
+                sequence = self._next_sequence(field)
+                # No retries: a failure just waits for the next successful poll
+                response = await self._async_deliver(field, value, 0)
+                if self._sequence[field] != sequence:
+                    continue
+                if not response:
+                    _LOGGER.debug(f"[Device {self.device_id}] Replay of {field}={value} failed, keeping it queued.")
+                    break
+                _LOGGER.info(f"[Device {self.device_id}] Replayed queued command {field}={value}.")
+                self.pending.pop(field, None)
+                delivered[field] = value
+            await self._async_save()
+        return delivered
+
+    async def async_remove(self) -> None:
+        """Delete the persisted queue, e.g. when the entry is removed."""
+        await self._store.async_remove()
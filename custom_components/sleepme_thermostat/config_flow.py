@@ -1,9 +1,34 @@
+import hashlib
 import logging
 import voluptuous as vol
 from homeassistant import config_entries
+from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
+from homeassistant.helpers.httpx_client import get_async_client
 from .sleepme import SleepMeClient
-from .const import DOMAIN, API_URL
+from .sleepme_api import SleepMeAPI
+from .const import (
+    DOMAIN,
+    API_URL,
+    ENTRY_TYPE_FLEET,
+    FLEET_DEVICE_ID,
+    CONF_BED_CONTROLLER_TRACKER,
+    CONF_BED_CONTROLLER_MIN_WRITE_INTERVAL,
+    CONF_BED_CONTROLLER_DEADBAND,
+    CONF_RECORD_TRAFFIC,
+    CONF_EXPORT_SNAPSHOTS,
+    CONF_SHARED_LIMITER_PATH,
+    CONF_SHARED_LIMITER_QUOTA,
+    CONF_LONG_TERM_STATISTICS,
+    CONF_EXCLUDE_RAW_SENSORS,
+    CONF_NIGHTLY_ANALYTICS,
+    CONF_DEADBAND_PREFIX,
+    CONF_MIN_PUBLISH_INTERVAL_PREFIX,
+    CONF_MAX_PUBLISH_INTERVAL_PREFIX,
+    DEFAULT_MIN_PUBLISH_INTERVAL,
+    DEFAULT_MAX_PUBLISH_INTERVAL,
+)
+from .bed_controller import DEFAULT_MIN_WRITE_INTERVAL, DEFAULT_DEADBAND
 from httpx import HTTPStatusError
 from .device_utils import get_device_type, get_device_title
 
@@ -19,6 +44,12 @@ class SleepMeThermostatConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         self.api_token = ""
         self.claimed_devices = []
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        """Return the options flow handler."""
+        return SleepMeThermostatOptionsFlow(config_entry)
+
     @staticmethod
     def _schema(api_token: str = "") -> vol.Schema:
         """Return the schema for the current step."""
@@ -26,6 +57,10 @@ class SleepMeThermostatConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             vol.Required("api_token", default=api_token): str,
         })
 
+    def _api(self) -> SleepMeAPI:
+        """Return an API wrapper on Home Assistant's shared HTTP client."""
+        return SleepMeAPI(API_URL, self.api_token, client=get_async_client(self.hass))
+
     async def async_step_user(self, user_input=None) -> FlowResult:
         """Handle the initial step."""
         errors = {}
@@ -35,7 +70,7 @@ class SleepMeThermostatConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             self.api_token = user_input.get("api_token")
 
             # Instantiate SleepMeClient to get the list of devices
-            client = SleepMeClient(API_URL, self.api_token)
+            client = SleepMeClient(API_URL, self.api_token, api=self._api())
 
             try:
                 # Get the list of claimed devices
@@ -78,14 +113,22 @@ class SleepMeThermostatConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
             # Retrieve the selected device name and ID
             device_id = user_input["device_id"]
+            if device_id == FLEET_DEVICE_ID:
+                return await self._async_create_fleet_entry()
+
             name = self.context["claimed_devices_dict"][device_id]
 
             # Set a unique ID for the device configuration
             await self.async_set_unique_id(device_id)
             self._abort_if_unique_id_configured()
 
+            # A fleet entry on the same account already manages every device on it
+            for entry in self._async_current_entries():
+                if entry.data.get("entry_type") == ENTRY_TYPE_FLEET and entry.data.get("api_token") == self.api_token:
+                    return self.async_abort(reason="managed_by_fleet")
+
             # Instantiate SleepMeClient to fetch device details
-            client = SleepMeClient(API_URL, self.api_token, device_id)
+            client = SleepMeClient(API_URL, self.api_token, device_id, api=self._api())
 
             try:
                 # Fetch the device status, which now includes "about" information
@@ -124,6 +167,7 @@ class SleepMeThermostatConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         # Prepare the selection form
         if self.claimed_devices:
             claimed_devices_dict = {device["id"]: device["name"] for device in self.claimed_devices}
+            claimed_devices_dict[FLEET_DEVICE_ID] = "All devices on this account"
             self.context["claimed_devices_dict"] = claimed_devices_dict
         else:
             errors["base"] = "no_devices_found"
@@ -138,6 +182,124 @@ class SleepMeThermostatConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             errors=errors
         )
 
+    async def _async_create_fleet_entry(self) -> FlowResult:
+        """Create one entry that manages every device on the token."""
+        # Never store the token itself in the unique ID
+        token_hash = hashlib.sha256(self.api_token.encode()).hexdigest()[:16]
+        await self.async_set_unique_id(f"{ENTRY_TYPE_FLEET}_{token_hash}")
+        self._abort_if_unique_id_configured()
+
+        return self.async_create_entry(
+            title="SleepMe Fleet",
+            data={
+                "api_url": API_URL,
+                "api_token": self.api_token,
+                "entry_type": ENTRY_TYPE_FLEET,
+            },
+        )
+
     async def async_step_import(self, user_input=None) -> FlowResult:
         """Handle import from YAML."""
         return await self.async_step_user(user_input)
+
+
+class SleepMeThermostatOptionsFlow(config_entries.OptionsFlow):
+    """Handle options for a SleepMe Thermostat entry."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """Initialize the options flow."""
+        # Older Home Assistant versions do not set config_entry on options flows, newer ones forbid setting it
+        self._entry = config_entry
+
+    async def async_step_init(self, user_input=None) -> FlowResult:
+        """Manage the options."""
+        if self._entry.data.get("entry_type") == ENTRY_TYPE_FLEET:
+            return self.async_abort(reason="fleet_no_options")
+
+        errors = {}
+        options = self._entry.options
+
+        if user_input is not None:
+            # Nightly analytics read the history of the raw sensors that option disables
+            if user_input.get(CONF_EXCLUDE_RAW_SENSORS) and user_input.get(CONF_NIGHTLY_ANALYTICS):
+                errors["base"] = "exclude_raw_with_analytics"
+                options = user_input
+            else:
+                if user_input.get(CONF_BED_CONTROLLER_TRACKER) == "none":
+                    user_input.pop(CONF_BED_CONTROLLER_TRACKER)
+                if not user_input.get(CONF_SHARED_LIMITER_PATH):
+                    user_input.pop(CONF_SHARED_LIMITER_PATH, None)
+                    user_input.pop(CONF_SHARED_LIMITER_QUOTA, None)
+                return self.async_create_entry(title="", data=user_input)
+
+        schema = {}
+
+        # Only sleep pads can be driven by a tracker
+        if self._entry.data.get("device_type", "sleep_pad") == "sleep_pad":
+            trackers = {"none": "None"}
+            for entry in self.hass.config_entries.async_entries(DOMAIN):
+                if entry.data.get("device_type") == "sleep_tracker":
+                    trackers[entry.data["device_id"]] = entry.title
+
+            schema[vol.Optional(
+                CONF_BED_CONTROLLER_TRACKER,
+                default=options.get(CONF_BED_CONTROLLER_TRACKER, "none"),
+            )] = vol.In(trackers)
+            schema[vol.Optional(
+                CONF_BED_CONTROLLER_MIN_WRITE_INTERVAL,
+                default=options.get(CONF_BED_CONTROLLER_MIN_WRITE_INTERVAL, DEFAULT_MIN_WRITE_INTERVAL),
+            )] = vol.All(vol.Coerce(int), vol.Range(min=60, max=3600))
+            schema[vol.Optional(
+                CONF_BED_CONTROLLER_DEADBAND,
+                default=options.get(CONF_BED_CONTROLLER_DEADBAND, DEFAULT_DEADBAND),
+            )] = vol.All(vol.Coerce(float), vol.Range(min=0.0, max=5.0))
+
+        schema[vol.Optional(
+            CONF_RECORD_TRAFFIC,
+            default=options.get(CONF_RECORD_TRAFFIC, False),
+        )] = bool
+        schema[vol.Optional(
+            CONF_EXPORT_SNAPSHOTS,
+            default=options.get(CONF_EXPORT_SNAPSHOTS, False),
+        )] = bool
+        # Deadband and write interval limits for each of the device's noisy sensors
+        from .sensor import SENSOR_DESCRIPTIONS
+
+        device_type = self._entry.data.get("device_type", "sleep_pad")
+        for description in SENSOR_DESCRIPTIONS:
+            if description.deadband is None or device_type not in description.device_types:
+                continue
+            schema[vol.Optional(
+                f"{CONF_DEADBAND_PREFIX}{description.key}",
+                default=options.get(f"{CONF_DEADBAND_PREFIX}{description.key}", description.deadband),
+            )] = vol.All(vol.Coerce(float), vol.Range(min=0.0, max=10.0))
+            schema[vol.Optional(
+                f"{CONF_MIN_PUBLISH_INTERVAL_PREFIX}{description.key}",
+                default=options.get(f"{CONF_MIN_PUBLISH_INTERVAL_PREFIX}{description.key}", DEFAULT_MIN_PUBLISH_INTERVAL),
+            )] = vol.All(vol.Coerce(int), vol.Range(min=0, max=3600))
+            schema[vol.Optional(
+                f"{CONF_MAX_PUBLISH_INTERVAL_PREFIX}{description.key}",
+                default=options.get(f"{CONF_MAX_PUBLISH_INTERVAL_PREFIX}{description.key}", DEFAULT_MAX_PUBLISH_INTERVAL),
+            )] = vol.All(vol.Coerce(int), vol.Range(min=60, max=86400))
+        schema[vol.Optional(
+            CONF_LONG_TERM_STATISTICS,
+            default=options.get(CONF_LONG_TERM_STATISTICS, False),
+        )] = bool
+        schema[vol.Optional(
+            CONF_EXCLUDE_RAW_SENSORS,
+            default=options.get(CONF_EXCLUDE_RAW_SENSORS, False),
+        )] = bool
+        schema[vol.Optional(
+            CONF_NIGHTLY_ANALYTICS,
+            default=options.get(CONF_NIGHTLY_ANALYTICS, False),
+        )] = bool
+        schema[vol.Optional(
+            CONF_SHARED_LIMITER_PATH,
+            default=options.get(CONF_SHARED_LIMITER_PATH, ""),
+        )] = str
+        schema[vol.Optional(
+            CONF_SHARED_LIMITER_QUOTA,
+            default=options.get(CONF_SHARED_LIMITER_QUOTA, 9),
+        )] = vol.All(vol.Coerce(int), vol.Range(min=1, max=9))
+
+        return self.async_show_form(step_id="init", data_schema=vol.Schema(schema), errors=errors)
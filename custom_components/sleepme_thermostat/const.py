@@ -6,4 +6,39 @@ DEFAULT_API_HEADERS = {
 
 API_URL = APP_API_URL  # Optional: Alias for APP_API_URL for consistency
 
-DOMAIN = "sleepme_thermostat"
\ No newline at end of file
+DOMAIN = "sleepme_thermostat"
+
+# Closed-loop bed temperature controller options
+CONF_BED_CONTROLLER_TRACKER = "bed_controller_tracker"
+CONF_BED_CONTROLLER_MIN_WRITE_INTERVAL = "bed_controller_min_write_interval"
+CONF_BED_CONTROLLER_DEADBAND = "bed_controller_deadband"
+
+# Record redacted API traffic to a cassette file for replay
+CONF_RECORD_TRAFFIC = "record_traffic"
+CASSETTE_DIR = "sleepme_cassettes"
+
+# Export raw snapshots to compressed NDJSON files
+CONF_EXPORT_SNAPSHOTS = "export_snapshots"
+EXPORT_DIR = "sleepme_export"
+
+# Account-level fleet entries manage every device on a token
+ENTRY_TYPE_FLEET = "fleet"
+FLEET_DEVICE_ID = "__fleet__"
+
+# Share one rate-limit budget between Home Assistant instances using the same token
+CONF_SHARED_LIMITER_PATH = "shared_limiter_path"
+CONF_SHARED_LIMITER_QUOTA = "shared_limiter_quota"
+
+# Aggregate noisy sensors into long-term statistics
+CONF_LONG_TERM_STATISTICS = "long_term_statistics"
+CONF_EXCLUDE_RAW_SENSORS = "exclude_raw_sensors"
+
+# Deadband filtering of noisy sensor state writes, each option suffixed with the sensor's key
+CONF_DEADBAND_PREFIX = "deadband_"
+CONF_MIN_PUBLISH_INTERVAL_PREFIX = "min_publish_interval_"
+CONF_MAX_PUBLISH_INTERVAL_PREFIX = "max_publish_interval_"
+DEFAULT_MIN_PUBLISH_INTERVAL = 0  # seconds
+DEFAULT_MAX_PUBLISH_INTERVAL = 900  # seconds
+
+# Nightly analytics over recorded history
+CONF_NIGHTLY_ANALYTICS = "nightly_analytics"
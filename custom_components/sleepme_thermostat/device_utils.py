@@ -1,8 +1,16 @@
 """Utilities for SleepMe device type detection and management."""
+import inspect
 import logging
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr
+from .const import DOMAIN
 
 _LOGGER = logging.getLogger(__name__)
 
+# Older Home Assistant versions can only merge a device's connections, not replace them
+_CAN_REPLACE_CONNECTIONS = "new_connections" in inspect.signature(dr.DeviceRegistry.async_update_device).parameters
+
 def get_device_type(device_info: dict, device_status: dict = None) -> str:
     """
     Determine device type from device info or status.
@@ -51,4 +59,32 @@ def should_create_climate_entity(device_type: str) -> bool:
 
 def should_create_tracker_sensors(device_type: str) -> bool:
     """Determine if sleep tracker sensors should be created for device type."""
-    return device_type == "sleep_tracker" 
\ No newline at end of file
+    return device_type == "sleep_tracker" 
+
+@callback
+def async_sync_device_metadata(hass: HomeAssistant, device_id: str, metadata: dict, entry: ConfigEntry = None) -> None:
+    """Apply refreshed static metadata to the device registry and config entry, touching only what differs."""
+    registry = dr.async_get(hass)
+    device_entry = registry.async_get_device(identifiers={(DOMAIN, device_id)})
+    if device_entry is not None:
+        changes = {}
+        if metadata.get("firmware_version") and metadata["firmware_version"] != device_entry.sw_version:
+            changes["sw_version"] = metadata["firmware_version"]
+        if metadata.get("model") and metadata["model"] != device_entry.model:
+            changes["model"] = metadata["model"]
+        if metadata.get("serial_number") and metadata["serial_number"] != device_entry.serial_number:
+            changes["serial_number"] = metadata["serial_number"]
+        mac = metadata.get("mac_address")
+        if mac and (dr.CONNECTION_NETWORK_MAC, dr.format_mac(mac)) not in device_entry.connections:
+            # Replace rather than merge where possible, so a swapped unit does not keep the old MAC
+            connection_key = "new_connections" if _CAN_REPLACE_CONNECTIONS else "merge_connections"
+            changes[connection_key] = {(dr.CONNECTION_NETWORK_MAC, mac)}
+        if changes:
+            _LOGGER.info(f"[Device {device_id}] Updating device registry: {changes}")
+            registry.async_update_device(device_entry.id, **changes)
+
+    if entry is not None:
+        changed = {key: value for key, value in metadata.items() if value is not None and entry.data.get(key) != value}
+        if changed:
+            _LOGGER.info(f"[Device {device_id}] Updating stored device information: {changed}")
+            hass.config_entries.async_update_entry(entry, data={**entry.data, **changed})
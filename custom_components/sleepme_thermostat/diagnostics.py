@@ -0,0 +1,44 @@
+"""Diagnostics support for SleepMe Thermostat."""
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from .const import DOMAIN, ENTRY_TYPE_FLEET
+
+TO_REDACT = {"api_token", "mac_address", "serial_number", "ip_address", "lan_address"}
+
+def _device_diagnostics(hass: HomeAssistant, device_id: str) -> dict:
+    update_manager = hass.data[DOMAIN].get(f"{device_id}_update_manager")
+    if update_manager is None:
+        return {"loaded": False}
+
+    limiter = update_manager.client.api.limiter
+    analytics = hass.data[DOMAIN].get(f"{device_id}_analytics")
+    return {
+        "loaded": True,
+        "update_interval": update_manager.update_interval.total_seconds() if update_manager.update_interval else None,
+        "last_update_success": update_manager.last_update_success,
+        "data_age": update_manager.data_age,
+        "data": async_redact_data(update_manager.data or {}, TO_REDACT),
+        "fanout_stats": update_manager.fanout_stats,
+        "suppressed_writes": update_manager.suppressed_writes,
+        "limiter": {"wait_count": limiter.wait_count, "total_wait": round(limiter.total_wait, 3)},
+        "setup_time": hass.data[DOMAIN].get("setup_times", {}).get(device_id),
+        "nightly_analytics": analytics.results if analytics is not None else None,
+    }
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict:
+    """Return diagnostics for a config entry."""
+    if entry.data.get("entry_type") == ENTRY_TYPE_FLEET:
+        fleet = hass.data[DOMAIN].get(entry.entry_id)
+        device_ids = list(fleet.devices) if fleet else []
+    else:
+        device_ids = [entry.data.get("device_id")]
+
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "devices": {device_id: _device_diagnostics(hass, device_id) for device_id in device_ids},
+        "last_profile": hass.data[DOMAIN].get("last_profile"),
+    }
@@ -0,0 +1,86 @@
+"""Shared base for the SleepMe sensor and binary sensor entities."""
+import time
+from homeassistant.core import callback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from .const import DOMAIN, DEFAULT_MIN_PUBLISH_INTERVAL, DEFAULT_MAX_PUBLISH_INTERVAL
+
+def device_label(device_type: str) -> str:
+    """Return the name prefix used for a device type's entities."""
+    return "ChiliPad Pro" if device_type == "sleep_pad" else "Sleep Tracker"
+
+def build_device_info(device_data: dict) -> dict:
+    """Return the device info shared by all of a device's entities."""
+    device_type = device_data.get("device_type", "sleep_pad")
+    return {
+        "identifiers": {(DOMAIN, device_data.get("device_id"))},
+        "name": f"{device_label(device_type)} {device_data.get('name')}",
+        "manufacturer": "SleepMe",
+        "model": device_data.get("model"),
+        "sw_version": device_data.get("firmware_version"),
+        "connections": {("mac", device_data.get("mac_address"))},
+        "serial_number": device_data.get("serial_number"),
+    }
+
+class SleepMeEntity(CoordinatorEntity):
+    """An entity whose value is one field of the device snapshot, as given by its description.
+
+    The update manager extracts every registered field once per snapshot, and
+    each entity just picks up its own value when the coordinator updates.
+
+    Entities with a deadband only write their state when the value moves by
+    at least the deadband and their minimum publish interval has passed. A
+    write is forced once their maximum publish interval has passed, and on
+    availability changes. All three are set per entity key. Skipped writes are counted in the update manager's
+    ``suppressed_writes``.
+
+    Subclasses name the attribute that holds their value in ``_value_attr``.
+    """
+
+    _value_attr = "_attr_native_value"
+
+    def __init__(self, coordinator, description, device_info, device_id, name, device_type):
+        super().__init__(coordinator)
+        self.entity_description = description
+        self._device_id = device_id
+        self._attr_name = f"{device_label(device_type)} {name} {description.name}"
+        self._attr_unique_id = f"{DOMAIN}_{device_id}_{description.key}"
+        self._attr_device_info = device_info
+
+        coordinator.register_value(description.key, description.section, description.field, description.value_fn)
+        self._deadband = coordinator.deadbands.get(description.key, getattr(description, "deadband", None))
+        self._min_publish_interval = coordinator.min_publish_intervals.get(description.key, DEFAULT_MIN_PUBLISH_INTERVAL)
+        self._max_publish_interval = coordinator.max_publish_intervals.get(description.key, DEFAULT_MAX_PUBLISH_INTERVAL)
+        self._published_value = coordinator.values.get(description.key)
+        self._published_available = None
+        self._published_at = None
+        setattr(self, self._value_attr, self._published_value)
+
+    def _should_publish(self, value, now: float) -> bool:
+        """Return whether a new value is worth a state write."""
+        if not self._deadband or self._published_at is None or self.available != self._published_available:
+            return True
+        elapsed = now - self._published_at
+        if elapsed >= self._max_publish_interval:
+            return True
+        numeric = (int, float)
+        if not isinstance(value, numeric) or not isinstance(self._published_value, numeric):
+            return value != self._published_value
+        return (
+            abs(value - self._published_value) >= self._deadband
+            and elapsed >= self._min_publish_interval
+        )
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        key = self.entity_description.key
+        value = self.coordinator.values.get(key)
+        now = time.monotonic()
+        if not self._should_publish(value, now):
+            self.coordinator.suppressed_writes[key] = self.coordinator.suppressed_writes.get(key, 0) + 1
+            return
+
+        self._published_value = value
+        self._published_available = self.available
+        self._published_at = now
+        setattr(self, self._value_attr, value)
+        super()._handle_coordinator_update()
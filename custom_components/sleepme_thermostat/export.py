@@ -0,0 +1,129 @@
+"""Batched export of raw device snapshots to rotating gzip NDJSON files."""
+import gzip
+import json
+import logging
+import os
+from collections import deque
+from datetime import timedelta
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.util import dt as dt_util
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 60
+DEFAULT_FLUSH_INTERVAL = timedelta(minutes=5)
+DEFAULT_MAX_FILE_BYTES = 5 * 1024 * 1024
+DEFAULT_ROTATE_INTERVAL = timedelta(hours=24)
+DEFAULT_MAX_BUFFERED = 2000
+
+class SnapshotExporter:
+    """Buffers coordinator snapshots in memory and writes them out in batches.
+
+    The coordinator listener only copies the snapshot into a bounded deque,
+    so it adds no I/O to the poll cycle. Serialization, compression and file
+    rotation all run in the executor. If the executor falls behind, the
+    oldest buffered snapshots are dropped and counted.
+    """
+
+    def __init__(self, hass: HomeAssistant, coordinator, directory: str,
+                 batch_size: int = DEFAULT_BATCH_SIZE,
+                 flush_interval: timedelta = DEFAULT_FLUSH_INTERVAL,
+                 max_file_bytes: int = DEFAULT_MAX_FILE_BYTES,
+                 rotate_interval: timedelta = DEFAULT_ROTATE_INTERVAL,
+                 max_buffered: int = DEFAULT_MAX_BUFFERED):
+        self.hass = hass
+        self.coordinator = coordinator
+        self.device_id = coordinator.device_id
+        self.directory = directory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_file_bytes = max_file_bytes
+        self.rotate_interval = rotate_interval
+        self._buffer = deque(maxlen=max_buffered)
+        self._flushing = False
+        self._flush_task = None
+        self._unsubs = []
+        self._current_path = None
+        self._current_opened = None
+        self.exported = 0
+        self.dropped = 0
+
+    @callback
+    def async_start(self) -> None:
+        """Start capturing coordinator updates and flushing on a timer."""
+        self._unsubs.append(self.coordinator.async_add_listener(self._handle_update))
+        self._unsubs.append(async_track_time_interval(self.hass, self._handle_timer, self.flush_interval))
+        _LOGGER.debug(f"[Device {self.device_id}] Exporting snapshots to {self.directory}")
+
+    async def async_stop(self) -> None:
+        """Stop capturing and write out whatever is still buffered."""
+        while self._unsubs:
+            self._unsubs.pop()()
+        # A background flush only writes what was buffered when it started, so wait for it and flush the rest
+        if self._flush_task is not None:
+            await self._flush_task
+        await self._async_flush()
+
+    @callback
+    def _handle_update(self) -> None:
+        data = self.coordinator.data
+        if not data:
+            return
+        if len(self._buffer) == self._buffer.maxlen:
+            self.dropped += 1
+        # Sections are mutated in place by optimistic updates, so copy them
+        self._buffer.append({
+            "ts": dt_util.utcnow().isoformat(),
+            "device_id": self.device_id,
+            "status": dict(data.get("status", {})),
+            "control": dict(data.get("control", {})),
+        })
+        if len(self._buffer) >= self.batch_size:
+            self._schedule_flush()
+
+    @callback
+    def _handle_timer(self, _now) -> None:
+        if self._buffer:
+            self._schedule_flush()
+
+    @callback
+    def _schedule_flush(self) -> None:
+        if self._flushing or (self._flush_task is not None and not self._flush_task.done()):
+            return
+        self._flush_task = self.hass.async_create_background_task(
+            self._async_flush(), f"sleepme_export_{self.device_id}"
+        )
+
+    async def _async_flush(self) -> None:
+        if self._flushing or not self._buffer:
+            return
+        self._flushing = True
+        records = list(self._buffer)
+        self._buffer.clear()
+        try:
+            await self.hass.async_add_executor_job(self._write_batch, records)
+            self.exported += len(records)
+        except OSError as err:
+            _LOGGER.error(f"[Device {self.device_id}] Failed to export {len(records)} snapshots: {err}")
+        finally:
+            self._flushing = False
+
+    def _write_batch(self, records: list) -> None:
+        """Append a batch to the current file, rotating it first if needed. Runs in the executor."""
+        now = dt_util.utcnow()
+        if (
+            self._current_path is None
+            or now - self._current_opened >= self.rotate_interval
+            or (os.path.exists(self._current_path) and os.path.getsize(self._current_path) >= self.max_file_bytes)
+        ):
+            os.makedirs(self.directory, exist_ok=True)
+            self._current_opened = now
+            self._current_path = os.path.join(
+                self.directory, f"{self.device_id}_{now.strftime('%Y%m%dT%H%M%S')}.ndjson.gz"
+            )
+
+        payload = "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records)
+        # Each batch is its own gzip member; concatenated members are still one valid gzip stream
+        with gzip.open(self._current_path, "at", encoding="utf-8") as file:
+            file.write(payload)
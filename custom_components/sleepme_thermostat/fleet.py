@@ -0,0 +1,229 @@
+"""Account-level fleet entries that manage every device on a token."""
+import asyncio
+import logging
+from datetime import timedelta
+from functools import partial
+from homeassistant import config_entries
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.httpx_client import get_async_client
+from .const import DOMAIN, ENTRY_TYPE_FLEET
+from .device_utils import async_sync_device_metadata, get_device_type
+from .sleepme import SleepMeClient
+from .sleepme_api import SleepMeAPI
+from .update_manager import SleepMeUpdateManager
+
+_LOGGER = logging.getLogger(__name__)
+
+RECONCILE_INTERVAL = timedelta(minutes=30)
+FLEET_PLATFORMS = ["sensor", "binary_sensor", "climate"]
+
+class SleepMeFleetManager:
+    """Keeps a fleet entry's devices in step with the account's device list.
+
+    All devices share one ``SleepMeAPI``, so there is a single HTTP client and
+    one rate limiter for the token. Each device still gets its own update
+    manager, registered under the same ``hass.data`` key a standalone entry
+    would use, so the platforms and the poll planner treat them the same.
+    Devices are added and removed incrementally; the entry is never reloaded.
+
+    Discovery runs in the background, since each new device needs one status
+    request behind the token's rate limit. Setup therefore returns at once
+    and devices appear as they are found.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, planner):
+        self.hass = hass
+        self.entry = entry
+        self.api_url = entry.data.get("api_url")
+        self.token = entry.data.get("api_token")
+        self.api = SleepMeAPI(self.api_url, self.token, client=get_async_client(hass))
+        self.client = SleepMeClient(self.api_url, self.token, api=self.api)
+        self.planner = planner
+        self.devices = {}
+        # The update managers this fleet created, so ones owned by other entries are never touched
+        self._managers = {}
+        self._entities = {}
+        self._platforms = {}
+        self._unsub_reconcile = None
+        self._reconcile_lock = asyncio.Lock()
+        self._reconcile_task = None
+
+    async def async_setup(self, on_discovered=None, timer=None) -> None:
+        """Start discovering devices in the background and reconciling periodically.
+
+        ``on_discovered`` is called once the first discovery has finished.
+        A ``LoopTimer`` passed as ``timer`` also times the discovery.
+        """
+        discovery = self._async_discover(on_discovered)
+        if timer is not None:
+            discovery = timer.async_run(discovery)
+        self._reconcile_task = self.entry.async_create_background_task(
+            self.hass, discovery, f"{DOMAIN} fleet discovery"
+        )
+        self._unsub_reconcile = async_track_time_interval(self.hass, self._handle_reconcile_timer, RECONCILE_INTERVAL)
+
+    async def async_unload(self) -> None:
+        """Stop reconciling and release every device's update manager."""
+        if self._unsub_reconcile is not None:
+            self._unsub_reconcile()
+            self._unsub_reconcile = None
+        if self._reconcile_task is not None and not self._reconcile_task.done():
+            self._reconcile_task.cancel()
+        self._reconcile_task = None
+        for device_id in list(self.devices):
+            await self._async_release_device(device_id)
+
+    async def _async_discover(self, on_discovered) -> None:
+        await self.async_reconcile()
+        if on_discovered is not None:
+            on_discovered()
+
+    @callback
+    def async_register_platform(self, platform: str, build_entities, async_add_entities) -> None:
+        """Remember how a platform builds entities and add them for the current devices."""
+        self._platforms[platform] = (build_entities, async_add_entities)
+        for device_id, device_data in self.devices.items():
+            self._add_platform_entities(platform, device_id, device_data)
+
+    @callback
+    def _handle_reconcile_timer(self, _now) -> None:
+        if self._reconcile_task is not None and not self._reconcile_task.done():
+            return
+        self._reconcile_task = self.entry.async_create_background_task(
+            self.hass, self.async_reconcile(), f"{DOMAIN} fleet reconcile"
+        )
+
+    async def async_reconcile(self) -> None:
+        """Add devices that appeared on the account and remove those that are gone."""
+        async with self._reconcile_lock:
+            await self._async_reconcile()
+
+    async def _async_reconcile(self) -> None:
+        listing = await self.client.get_claimed_devices()
+        if not listing:
+            # An empty list is also what a failed request returns, so never treat it as "remove everything"
+            _LOGGER.debug("Fleet device listing was empty, keeping current devices.")
+            return
+
+        # Devices that have their own config entry are left to it
+        standalone = {
+            entry.data.get("device_id")
+            for entry in self.hass.config_entries.async_entries(DOMAIN)
+            if entry.data.get("entry_type") != ENTRY_TYPE_FLEET
+        }
+        listed = {device["id"]: device for device in listing if device.get("id") not in standalone}
+
+        for device_id in set(self.devices) - set(listed):
+            await self._async_remove_device(device_id, handed_over=device_id in standalone)
+
+        for device_id, device in listed.items():
+            if device_id not in self.devices:
+                await self._async_add_device(device)
+
+        self._remove_stale_registry_devices(set(listed))
+
+    async def _async_add_device(self, device: dict) -> None:
+        device_id = device["id"]
+        # Coordinators created inside the entry's context add an unload callback to it that is never
+        # removed, one per reconcile attempt. The fleet shuts its managers down itself, so create them outside it.
+        context = config_entries.current_entry.set(None)
+        try:
+            update_manager = SleepMeUpdateManager(self.hass, self.api_url, self.token, device_id, api=self.api)
+        finally:
+            config_entries.current_entry.reset(context)
+        await update_manager.commands.async_load()
+        await update_manager.async_refresh()
+        # Failed polls fall back to an empty snapshot, which would misdetect the device type
+        if update_manager.last_valid_time is None:
+            _LOGGER.warning(f"[Device {device_id}] Could not fetch status, will retry on the next reconcile.")
+            await update_manager.async_shutdown()
+            return
+
+        metadata = update_manager.metadata
+        device_type = get_device_type(device, {"about": metadata})
+        device_data = {
+            "device_id": device_id,
+            "name": device.get("name"),
+            "device_type": device_type,
+            **metadata,
+        }
+
+        self.devices[device_id] = device_data
+        self._managers[device_id] = update_manager
+        self.hass.data[DOMAIN][f"{device_id}_update_manager"] = update_manager
+        update_manager.async_add_metadata_listener(partial(self._handle_metadata, device_id))
+        self.planner.async_register(update_manager)
+        _LOGGER.info(f"Fleet added {device_type} device {device_id}.")
+
+        for platform in self._platforms:
+            self._add_platform_entities(platform, device_id, device_data)
+
+    @callback
+    def _handle_metadata(self, device_id: str, metadata: dict) -> None:
+        """Keep a device's stored information and registry entry current; fleet devices have no entry of their own."""
+        device_data = self.devices.get(device_id)
+        if device_data is not None:
+            device_data.update({key: value for key, value in metadata.items() if value is not None})
+        async_sync_device_metadata(self.hass, device_id, metadata)
+
+    @callback
+    def _add_platform_entities(self, platform: str, device_id: str, device_data: dict) -> None:
+        build_entities, async_add_entities = self._platforms[platform]
+        coordinator = self._managers[device_id]
+        entities = build_entities(self.hass, coordinator, device_data)
+        self._entities.setdefault(device_id, []).extend(entities)
+        async_add_entities(entities)
+
+    async def _async_remove_device(self, device_id: str, handed_over: bool = False) -> None:
+        """Remove a device from this entry.
+
+        A device handed over to its own entry keeps its registry entities and
+        queued commands, which that entry now uses.
+        """
+        _LOGGER.info(f"Fleet removing device {device_id}, it is no longer managed by this entry.")
+        entity_registry = er.async_get(self.hass)
+        for entity in self._entities.pop(device_id, []):
+            entity_id = entity.entity_id
+            await entity.async_remove()
+            if not handed_over and entity_id and entity_registry.async_get(entity_id) is not None:
+                entity_registry.async_remove(entity_id)
+        update_manager = self._managers.get(device_id)
+        if update_manager is not None and not handed_over:
+            await update_manager.commands.async_remove()
+        await self._async_release_device(device_id)
+
+        registry = dr.async_get(self.hass)
+        device_entry = registry.async_get_device(identifiers={(DOMAIN, device_id)})
+        if device_entry is not None:
+            self._detach_device(registry, device_entry)
+
+    async def _async_release_device(self, device_id: str) -> None:
+        self.devices.pop(device_id, None)
+        self._entities.pop(device_id, None)
+        update_manager = self._managers.pop(device_id, None)
+        if update_manager is None:
+            return
+        # A standalone entry for the same device may have replaced these keys
+        if self.hass.data[DOMAIN].get(f"{device_id}_update_manager") is update_manager:
+            self.hass.data[DOMAIN].pop(f"{device_id}_update_manager")
+            self.hass.data[DOMAIN].pop(device_id, None)
+        self.planner.async_unregister(update_manager)
+        await update_manager.async_shutdown()
+
+    @callback
+    def _remove_stale_registry_devices(self, listed: set) -> None:
+        """Drop registry devices left behind by devices removed while Home Assistant was stopped."""
+        registry = dr.async_get(self.hass)
+        for device_entry in dr.async_entries_for_config_entry(registry, self.entry.entry_id):
+            device_ids = {identifier[1] for identifier in device_entry.identifiers if identifier[0] == DOMAIN}
+            if device_ids and not device_ids & listed:
+                _LOGGER.debug(f"Removing stale fleet device {device_ids} from the device registry.")
+                self._detach_device(registry, device_entry)
+
+    @callback
+    def _detach_device(self, registry, device_entry) -> None:
+        """Unlink a device from this entry; the registry deletes it if no other entry uses it."""
+        registry.async_update_device(device_entry.id, remove_config_entry_id=self.entry.entry_id)
@@ -0,0 +1,59 @@
+"""Measure how long coroutines hold the event loop."""
+import time
+import types
+
+class LoopTimer:
+    """Times every step a coroutine runs on the event loop between two awaits.
+
+    A step runs without yielding, so its duration is time the loop could not
+    run anything else. Waiting on I/O, the rate limiter or the executor is
+    not counted, and neither are other tasks running meanwhile. Tasks the
+    coroutine starts are counted only for what they run eagerly.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.blocking = 0.0
+        self.max_step = 0.0
+        self.steps = 0
+
+    async def async_run(self, coro):
+        """Await ``coro`` with each of its steps timed."""
+        return await self._drive(coro)
+
+    @types.coroutine
+    def _drive(self, coro):
+        value, error = None, None
+        while True:
+            began = time.perf_counter()
+            try:
+                if error is None:
+                    yielded = coro.send(value)
+                else:
+                    yielded = coro.throw(error)
+            except StopIteration as stop:
+                self._add_step(time.perf_counter() - began)
+                return stop.value
+            except BaseException:
+                self._add_step(time.perf_counter() - began)
+                raise
+            self._add_step(time.perf_counter() - began)
+            try:
+                value, error = (yield yielded), None
+            except BaseException as err:
+                # Cancellation and the like are passed on to the timed coroutine
+                value, error = None, err
+
+    def _add_step(self, duration: float) -> None:
+        self.blocking += duration
+        self.max_step = max(self.max_step, duration)
+        self.steps += 1
+
+    def as_dict(self) -> dict:
+        """Wall time since the timer was created, and the loop time its coroutines took."""
+        return {
+            "wall": time.perf_counter() - self.started,
+            "blocking": self.blocking,
+            "max_step": self.max_step,
+            "steps": self.steps,
+        }
@@ -0,0 +1,69 @@
+"""Stagger device polls that share an API token across the rate-limit window."""
+import logging
+import math
+from homeassistant.core import HomeAssistant, callback
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_POLL_INTERVAL = 60  # seconds
+MAX_REQUESTS_PER_MINUTE = 9
+COMMAND_HEADROOM = 3  # requests per minute kept free for user commands
+
+class SleepMePollPlanner:
+    """Assigns each device on a token a phase offset within the poll interval.
+
+    Polls get ``MAX_REQUESTS_PER_MINUTE - COMMAND_HEADROOM`` requests per
+    minute. When there are more devices than that, the interval is stretched
+    so the polls still fit. Devices are spaced evenly across the interval and
+    the plan is rebuilt whenever a device is added or removed.
+    """
+
+    def __init__(self, hass: HomeAssistant, max_requests_per_minute: int = MAX_REQUESTS_PER_MINUTE,
+                 command_headroom: int = COMMAND_HEADROOM, base_interval: float = DEFAULT_POLL_INTERVAL):
+        self.hass = hass
+        self.poll_budget = max(1, max_requests_per_minute - command_headroom)
+        self.base_interval = base_interval
+        self._coordinators = {}
+
+    @property
+    def poll_interval(self) -> float:
+        """Return the interval that keeps all polls inside the poll budget."""
+        devices = len(self._coordinators)
+        return max(self.base_interval, math.ceil(devices * 60 / self.poll_budget))
+
+    def offsets(self) -> dict:
+        """Return the phase offset in seconds assigned to each device."""
+        interval = self.poll_interval
+        device_ids = sorted(self._coordinators)
+        return {device_id: index * interval / len(device_ids) for index, device_id in enumerate(device_ids)}
+
+    @callback
+    def async_register(self, coordinator) -> None:
+        """Add a device's coordinator to the plan and rebalance."""
+        self._coordinators[coordinator.device_id] = coordinator
+        self._async_rebalance()
+
+    @callback
+    def async_unregister(self, coordinator) -> None:
+        """Remove a device's coordinator from the plan and rebalance."""
+        self._coordinators.pop(coordinator.device_id, None)
+        coordinator.poll_phase = None
+        self._async_rebalance()
+
+    @property
+    def is_empty(self) -> bool:
+        return not self._coordinators
+
+    @callback
+    def _async_rebalance(self) -> None:
+        """Give every device its interval and move its next poll to its phase."""
+        if not self._coordinators:
+            return
+
+        interval = self.poll_interval
+        _LOGGER.debug(f"Planning polls for {len(self._coordinators)} devices every {interval}s.")
+
+        for device_id, offset in self.offsets().items():
+            _LOGGER.debug(f"[Device {device_id}] Poll phase {offset:.1f}s of {interval}s.")
+            # The coordinator reschedules its own next poll, so there is never an extra one
+            self._coordinators[device_id].async_set_poll_phase(offset, interval)
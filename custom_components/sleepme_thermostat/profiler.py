@@ -0,0 +1,105 @@
+"""On-demand profiling of the integration's hot paths."""
+import asyncio
+import cProfile
+import logging
+import os
+import pstats
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util import dt as dt_util
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+PROFILE_DIR = "sleepme_profiles"
+SLOW_CALLBACK_DURATION = 0.05  # seconds
+
+_PACKAGE_DIR = os.path.dirname(__file__)
+
+class _SlowCallbackHandler(logging.Handler):
+    """Collects asyncio's "Executing <handle> took N seconds" warnings that involve this integration."""
+
+    def __init__(self):
+        super().__init__(logging.WARNING)
+        self.events = []
+
+    def emit(self, record):
+        if not isinstance(record.msg, str) or not record.msg.startswith("Executing") or len(record.args or ()) < 2:
+            return
+        handle, duration = record.args[0], record.args[1]
+        description = repr(handle)
+        if "sleepme" in description.lower():
+            self.events.append({"callback": description[:300], "duration": round(duration, 4)})
+
+def summarize(profiler: cProfile.Profile, top: int) -> list:
+    """Return the integration's functions with the most cumulative time."""
+    stats = pstats.Stats(profiler)
+    rows = []
+    for (filename, line, function), (_cc, calls, total, cumulative, _callers) in stats.stats.items():
+        if not filename.startswith(_PACKAGE_DIR):
+            continue
+        rows.append({
+            "function": f"{os.path.basename(filename)}:{line}({function})",
+            "calls": calls,
+            "total_time": round(total, 6),
+            "cumulative_time": round(cumulative, 6),
+        })
+    rows.sort(key=lambda row: row["cumulative_time"], reverse=True)
+    return rows[:top]
+
+async def async_profile(hass: HomeAssistant, duration: float, top: int = 25) -> dict:
+    """Profile the event loop for ``duration`` seconds and keep a summary of the integration's share.
+
+    cProfile sees the whole loop thread, so the summary is filtered down to
+    this package's functions. The full profile is written next to it for
+    tools such as snakeviz. Slow-callback warnings are captured by turning on
+    asyncio debug mode for the same window.
+    """
+    domain_data = hass.data[DOMAIN]
+    if domain_data.get("profiling"):
+        raise HomeAssistantError("A SleepMe profile is already running.")
+
+    profiler = cProfile.Profile()
+    try:
+        # Enabled before touching any global state, as it fails if another profiler is active
+        profiler.enable()
+    except ValueError as err:
+        raise HomeAssistantError(f"Cannot start the SleepMe profile: {err}") from err
+
+    loop = hass.loop
+    previous_debug = loop.get_debug()
+    previous_slow = loop.slow_callback_duration
+    handler = _SlowCallbackHandler()
+    asyncio_logger = logging.getLogger("asyncio")
+
+    started = dt_util.utcnow()
+    domain_data["profiling"] = True
+    try:
+        asyncio_logger.addHandler(handler)
+        loop.slow_callback_duration = SLOW_CALLBACK_DURATION
+        loop.set_debug(True)
+        await asyncio.sleep(duration)
+    finally:
+        profiler.disable()
+        loop.set_debug(previous_debug)
+        loop.slow_callback_duration = previous_slow
+        asyncio_logger.removeHandler(handler)
+        domain_data["profiling"] = False
+
+    path = hass.config.path(PROFILE_DIR, f"sleepme_{started.strftime('%Y%m%dT%H%M%S')}.prof")
+    await hass.async_add_executor_job(_dump_stats, profiler, path)
+
+    summary = {
+        "started": started.isoformat(),
+        "duration": duration,
+        "artifact": path,
+        "top": summarize(profiler, top),
+        "slow_callbacks": sorted(handler.events, key=lambda event: event["duration"], reverse=True)[:top],
+    }
+    domain_data["last_profile"] = summary
+    _LOGGER.info(f"SleepMe profile written to {path} with {len(handler.events)} slow callbacks.")
+    return summary
+
+def _dump_stats(profiler: cProfile.Profile, path: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    profiler.dump_stats(path)
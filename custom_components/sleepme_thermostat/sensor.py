@@ -1,259 +1,306 @@
 import logging
-from homeassistant.components.sensor import SensorEntity, SensorDeviceClass
+from dataclasses import dataclass
+from typing import Any, Callable
+from homeassistant.components.sensor import (
+    RestoreSensor,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorDeviceClass,
+)
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity import EntityCategory
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from homeassistant.const import UnitOfTemperature, PERCENTAGE
-from .const import DOMAIN
+from homeassistant.const import UnitOfTemperature, UnitOfTime, PERCENTAGE
+from .const import DOMAIN, ENTRY_TYPE_FLEET
+from .analytics import SIGNAL_ANALYTICS_UPDATED
+from .entity import SleepMeEntity, build_device_info, device_label
 
 _LOGGER = logging.getLogger(__name__)
 
-async def async_setup_entry(hass, entry, async_add_entities):
-    """Set up SleepMe sensors from a config entry."""
-    device_id = entry.data.get("device_id")
-    name = entry.data.get("name")
-    device_type = entry.data.get("device_type", "sleep_pad")
-    coordinator = hass.data[DOMAIN][f"{device_id}_update_manager"]
-
-    _LOGGER.debug(f"[Device {device_id}] Setting up {device_type} sensor platform from config entry.")
+@dataclass(frozen=True, kw_only=True)
+class SleepMeSensorEntityDescription(SensorEntityDescription):
+    """Describes a SleepMe sensor as a field of the device snapshot."""
 
-    # Get device info for all sensors
-    device_info = {
-        "identifiers": {(DOMAIN, device_id)},
-        "name": f"{'ChiliPad Pro' if device_type == 'sleep_pad' else 'Sleep Tracker'} {name}",
-        "manufacturer": "SleepMe",
-        "model": entry.data.get("model"),
-        "sw_version": entry.data.get("firmware_version"),
-        "connections": {("mac", entry.data.get("mac_address"))},
-        "serial_number": entry.data.get("serial_number"),
-    }
+    section: str
+    field: str
+    value_fn: Callable[[Any], Any] | None = None
+    device_types: tuple = ("sleep_pad", "sleep_tracker")
+    # Noisy readings that can be kept as aggregated long-term statistics instead of raw states
+    long_term_statistics: bool = False
+    # Changes smaller than this are not written until the heartbeat interval passes
+    deadband: float | None = None
 
+SENSOR_DESCRIPTIONS: tuple[SleepMeSensorEntityDescription, ...] = (
     # Common sensors for both device types
-    sensors = [
-        IPAddressSensor(coordinator, device_info, device_id, name, device_type),
-        LANAddressSensor(coordinator, device_info, device_id, name, device_type),
+    SleepMeSensorEntityDescription(
+        key="ip_address",
+        name="IP Address",
+        icon="mdi:ip",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        section="about",
+        field="ip_address",
+    ),
+    SleepMeSensorEntityDescription(
+        key="lan_address",
+        name="LAN Address",
+        icon="mdi:lan",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        section="about",
+        field="lan_address",
+    ),
+    # Sleep pad control sensors
+    SleepMeSensorEntityDescription(
+        key="brightness_level",
+        name="Brightness Level",
+        icon="mdi:brightness-6",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        native_unit_of_measurement=PERCENTAGE,
+        section="control",
+        field="brightness_level",
+        device_types=("sleep_pad",),
+    ),
+    SleepMeSensorEntityDescription(
+        key="display_temperature_unit",
+        name="Display Temperature Unit",
+        icon="mdi:thermometer",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        section="control",
+        field="display_temperature_unit",
+        value_fn=lambda value: value.upper() if value else None,
+        device_types=("sleep_pad",),
+    ),
+    SleepMeSensorEntityDescription(
+        key="time_zone",
+        name="Time Zone",
+        icon="mdi:earth",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        section="control",
+        field="time_zone",
+        device_types=("sleep_pad",),
+    ),
+    SleepMeSensorEntityDescription(
+        key="set_temperature",
+        name="Set Temperature",
+        icon="mdi:thermometer-plus",
+        device_class=SensorDeviceClass.TEMPERATURE,
+        native_unit_of_measurement=UnitOfTemperature.FAHRENHEIT,
+        section="control",
+        field="set_temperature_f",
+        device_types=("sleep_pad",),
+    ),
+    # Sleep pad status sensors
+    SleepMeSensorEntityDescription(
+        key="water_level",
+        name="Water Level",
+        icon="mdi:water-percent",
+        native_unit_of_measurement=PERCENTAGE,
+        section="status",
+        field="water_level",
+        device_types=("sleep_pad",),
+    ),
+    SleepMeSensorEntityDescription(
+        key="water_temperature",
+        name="Water Temperature",
+        icon="mdi:thermometer-water",
+        device_class=SensorDeviceClass.TEMPERATURE,
+        native_unit_of_measurement=UnitOfTemperature.FAHRENHEIT,
+        section="status",
+        field="water_temperature_f",
+        device_types=("sleep_pad",),
+        long_term_statistics=True,
+        deadband=0.5,
+    ),
+    # Sleep tracker environment sensors
+    SleepMeSensorEntityDescription(
+        key="environment_temperature",
+        name="Environment Temperature",
+        icon="mdi:thermometer",
+        device_class=SensorDeviceClass.TEMPERATURE,
+        native_unit_of_measurement=UnitOfTemperature.FAHRENHEIT,
+        section="status",
+        field="environment_temperature_f",
+        device_types=("sleep_tracker",),
+        long_term_statistics=True,
+        deadband=0.5,
+    ),
+    SleepMeSensorEntityDescription(
+        key="environment_humidity",
+        name="Environment Humidity",
+        icon="mdi:water-percent",
+        device_class=SensorDeviceClass.HUMIDITY,
+        native_unit_of_measurement=PERCENTAGE,
+        section="status",
+        field="environment_humidity",
+        device_types=("sleep_tracker",),
+        long_term_statistics=True,
+        deadband=1.0,
+    ),
+    SleepMeSensorEntityDescription(
+        key="bed_temperature",
+        name="Bed Temperature",
+        icon="mdi:bed",
+        device_class=SensorDeviceClass.TEMPERATURE,
+        native_unit_of_measurement=UnitOfTemperature.FAHRENHEIT,
+        section="status",
+        field="bed_temperature_f",
+        device_types=("sleep_tracker",),
+        long_term_statistics=True,
+        deadband=0.5,
+    ),
+)
+
+def statistic_descriptions(device_type: str) -> list:
+    """Return the sensor descriptions a device keeps long-term statistics for."""
+    return [
+        description for description in SENSOR_DESCRIPTIONS
+        if description.long_term_statistics and device_type in description.device_types
     ]
 
-    # Device-specific sensors
-    if device_type == "sleep_pad":
-        sensors.extend([
-            # Sleep pad control sensors
-            BrightnessLevelSensor(coordinator, device_info, device_id, name),
-            DisplayTemperatureUnitSensor(coordinator, device_info, device_id, name),
-            TimeZoneSensor(coordinator, device_info, device_id, name),
-            SetTemperatureSensor(coordinator, device_info, device_id, name),
-            
-            # Sleep pad status sensors
-            WaterLevelSensor(coordinator, device_info, device_id, name),
-            WaterTemperatureSensor(coordinator, device_info, device_id, name),
-        ])
-    elif device_type == "sleep_tracker":
-        sensors.extend([
-            # Sleep tracker environment sensors
-            EnvironmentTemperatureSensor(coordinator, device_info, device_id, name),
-            EnvironmentHumiditySensor(coordinator, device_info, device_id, name),
-            BedTemperatureSensor(coordinator, device_info, device_id, name),
-        ])
-
-    _LOGGER.debug(f"[Device {device_id}] Adding {len(sensors)} sensors for {device_type}")
-    async_add_entities(sensors)
-
-# Common sensors for both device types
-class IPAddressSensor(CoordinatorEntity, SensorEntity):
-    """Representation of a sensor that indicates the IP address."""
-
-    def __init__(self, coordinator, device_info, device_id, name, device_type):
-        super().__init__(coordinator)
-        self._device_id = device_id
-        self._device_type = device_type
-        device_name = "ChiliPad Pro" if device_type == "sleep_pad" else "Sleep Tracker"
-        self._attr_name = f"{device_name} {name} IP Address"
-        self._attr_unique_id = f"{DOMAIN}_{device_id}_ip_address"
-        self._attr_icon = "mdi:ip"
-        self._attr_entity_category = EntityCategory.DIAGNOSTIC
-        self._attr_device_info = device_info
-
-    @property
-    def state(self):
-        """Return the IP address of the device."""
-        return self.coordinator.data.get("about", {}).get("ip_address")
-
-class LANAddressSensor(CoordinatorEntity, SensorEntity):
-    """Representation of a sensor that indicates the LAN address."""
-
-    def __init__(self, coordinator, device_info, device_id, name, device_type):
-        super().__init__(coordinator)
-        self._device_id = device_id
-        self._device_type = device_type
-        device_name = "ChiliPad Pro" if device_type == "sleep_pad" else "Sleep Tracker"
-        self._attr_name = f"{device_name} {name} LAN Address"
-        self._attr_unique_id = f"{DOMAIN}_{device_id}_lan_address"
-        self._attr_icon = "mdi:lan"
-        self._attr_entity_category = EntityCategory.DIAGNOSTIC
-        self._attr_device_info = device_info
-
-    @property
-    def state(self):
-        """Return the LAN address of the device."""
-        return self.coordinator.data.get("about", {}).get("lan_address")
-
-# Sleep pad specific sensors
-class BrightnessLevelSensor(CoordinatorEntity, SensorEntity):
-    """Representation of a sensor that indicates the brightness level."""
-
-    def __init__(self, coordinator, device_info, device_id, name):
-        super().__init__(coordinator)
-        self._device_id = device_id
-        self._attr_name = f"ChiliPad Pro {name} Brightness Level"
-        self._attr_unique_id = f"{DOMAIN}_{device_id}_brightness_level"
-        self._attr_icon = "mdi:brightness-6"
-        self._attr_entity_category = EntityCategory.DIAGNOSTIC
-        self._attr_native_unit_of_measurement = PERCENTAGE
-        self._attr_device_info = device_info
-
-    @property
-    def state(self):
-        """Return the brightness level of the device."""
-        return self.coordinator.data.get("control", {}).get("brightness_level")
-
-class DisplayTemperatureUnitSensor(CoordinatorEntity, SensorEntity):
-    """Representation of a sensor that indicates the display temperature unit."""
-
-    def __init__(self, coordinator, device_info, device_id, name):
-        super().__init__(coordinator)
-        self._device_id = device_id
-        self._attr_name = f"ChiliPad Pro {name} Display Temperature Unit"
-        self._attr_unique_id = f"{DOMAIN}_{device_id}_display_temperature_unit"
-        self._attr_icon = "mdi:thermometer"
-        self._attr_entity_category = EntityCategory.DIAGNOSTIC
-        self._attr_device_info = device_info
-
-    @property
-    def state(self):
-        """Return the display temperature unit of the device in uppercase."""
-        temp_unit = self.coordinator.data.get("control", {}).get("display_temperature_unit")
-        return temp_unit.upper() if temp_unit else None
-
-class TimeZoneSensor(CoordinatorEntity, SensorEntity):
-    """Representation of a sensor that indicates the time zone."""
-
-    def __init__(self, coordinator, device_info, device_id, name):
-        super().__init__(coordinator)
-        self._device_id = device_id
-        self._attr_name = f"ChiliPad Pro {name} Time Zone"
-        self._attr_unique_id = f"{DOMAIN}_{device_id}_time_zone"
-        self._attr_icon = "mdi:earth"
-        self._attr_entity_category = EntityCategory.DIAGNOSTIC
-        self._attr_device_info = device_info
-
-    @property
-    def state(self):
-        """Return the time zone of the device."""
-        return self.coordinator.data.get("control", {}).get("time_zone")
+@callback
+def async_set_raw_sensors_enabled(hass: HomeAssistant, entry_id: str, device_data: dict, enabled: bool) -> None:
+    """Disable the raw high-frequency sensors so they are not recorded, or re-enable them.
 
-class SetTemperatureSensor(CoordinatorEntity, SensorEntity):
-    """Representation of a sensor that indicates the set (target) temperature."""
-
-    def __init__(self, coordinator, device_info, device_id, name):
-        super().__init__(coordinator)
-        self._device_id = device_id
-        self._attr_name = f"ChiliPad Pro {name} Set Temperature"
-        self._attr_unique_id = f"{DOMAIN}_{device_id}_set_temperature"
-        self._attr_icon = "mdi:thermometer-plus"
-        self._attr_device_class = SensorDeviceClass.TEMPERATURE
-        self._attr_native_unit_of_measurement = UnitOfTemperature.FAHRENHEIT
-        self._attr_device_info = device_info
-
-    @property
-    def state(self):
-        """Return the set temperature of the device in Fahrenheit."""
-        return self.coordinator.data.get("control", {}).get("set_temperature_f")
-
-class WaterLevelSensor(CoordinatorEntity, SensorEntity):
-    """Representation of a sensor that indicates the water level."""
-
-    def __init__(self, coordinator, device_info, device_id, name):
-        super().__init__(coordinator)
-        self._device_id = device_id
-        self._attr_name = f"ChiliPad Pro {name} Water Level"
-        self._attr_unique_id = f"{DOMAIN}_{device_id}_water_level"
-        self._attr_icon = "mdi:water-percent"
-        self._attr_native_unit_of_measurement = PERCENTAGE
-        self._attr_device_info = device_info
+    Only entities this integration disabled are re-enabled; a user's choice is left alone.
+    """
+    registry = er.async_get(hass)
+    unique_ids = {
+        f"{DOMAIN}_{device_data.get('device_id')}_{description.key}"
+        for description in statistic_descriptions(device_data.get("device_type", "sleep_pad"))
+    }
+    for entity in er.async_entries_for_config_entry(registry, entry_id):
+        if entity.unique_id not in unique_ids:
+            continue
+        if not enabled and entity.disabled_by is None:
+            registry.async_update_entity(entity.entity_id, disabled_by=er.RegistryEntryDisabler.INTEGRATION)
+        elif enabled and entity.disabled_by == er.RegistryEntryDisabler.INTEGRATION:
+            registry.async_update_entity(entity.entity_id, disabled_by=None)
+
+@dataclass(frozen=True, kw_only=True)
+class SleepMeNightlySensorEntityDescription(SensorEntityDescription):
+    """Describes a summary of last night, as a key of the nightly analytics results."""
+
+    device_types: tuple = ("sleep_pad", "sleep_tracker")
+
+NIGHTLY_SENSOR_DESCRIPTIONS: tuple[SleepMeNightlySensorEntityDescription, ...] = (
+    SleepMeNightlySensorEntityDescription(
+        key="time_at_setpoint",
+        name="Last Night Time at Setpoint",
+        icon="mdi:target",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MINUTES,
+        device_types=("sleep_pad",),
+    ),
+    SleepMeNightlySensorEntityDescription(
+        key="heating_time",
+        name="Last Night Heating Time",
+        icon="mdi:heat-wave",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MINUTES,
+        device_types=("sleep_pad",),
+    ),
+    SleepMeNightlySensorEntityDescription(
+        key="cooling_time",
+        name="Last Night Cooling Time",
+        icon="mdi:snowflake",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MINUTES,
+        device_types=("sleep_pad",),
+    ),
+    SleepMeNightlySensorEntityDescription(
+        key="mean_bed_temperature",
+        name="Last Night Mean Bed Temperature",
+        icon="mdi:bed",
+        device_class=SensorDeviceClass.TEMPERATURE,
+        native_unit_of_measurement=UnitOfTemperature.FAHRENHEIT,
+        device_types=("sleep_tracker",),
+    ),
+    SleepMeNightlySensorEntityDescription(
+        key="mean_room_temperature",
+        name="Last Night Mean Room Temperature",
+        icon="mdi:home-thermometer",
+        device_class=SensorDeviceClass.TEMPERATURE,
+        native_unit_of_measurement=UnitOfTemperature.FAHRENHEIT,
+        device_types=("sleep_tracker",),
+    ),
+    SleepMeNightlySensorEntityDescription(
+        key="humidity_bed_correlation",
+        name="Last Night Humidity/Bed Temperature Correlation",
+        icon="mdi:chart-scatter-plot",
+        device_types=("sleep_tracker",),
+    ),
+)
 
-    @property
-    def state(self):
-        """Return the water level of the device."""
-        return self.coordinator.data.get("status", {}).get("water_level")
+async def async_setup_entry(hass, entry, async_add_entities):
+    """Set up SleepMe sensors from a config entry."""
+    if entry.data.get("entry_type") == ENTRY_TYPE_FLEET:
+        # Fleet entries add sensors per device as devices are discovered
+        hass.data[DOMAIN][entry.entry_id].async_register_platform("sensor", _build_sensors, async_add_entities)
+        return
 
-class WaterTemperatureSensor(CoordinatorEntity, SensorEntity):
-    """Representation of a sensor that indicates the current water temperature."""
+    device_id = entry.data.get("device_id")
+    coordinator = hass.data[DOMAIN][f"{device_id}_update_manager"]
+    async_add_entities(_build_sensors(hass, coordinator, entry.data))
 
-    def __init__(self, coordinator, device_info, device_id, name):
-        super().__init__(coordinator)
-        self._device_id = device_id
-        self._attr_name = f"ChiliPad Pro {name} Water Temperature"
-        self._attr_unique_id = f"{DOMAIN}_{device_id}_water_temperature"
-        self._attr_icon = "mdi:thermometer-water"
-        self._attr_device_class = SensorDeviceClass.TEMPERATURE
-        self._attr_native_unit_of_measurement = UnitOfTemperature.FAHRENHEIT
-        self._attr_device_info = device_info
+def _build_sensors(hass, coordinator, device_data):
+    """Build the sensors for one device."""
+    device_id = device_data.get("device_id")
+    name = device_data.get("name")
+    device_type = device_data.get("device_type", "sleep_pad")
 
-    @property
-    def state(self):
-        """Return the current water temperature of the device in Fahrenheit."""
-        return self.coordinator.data.get("status", {}).get("water_temperature_f")
+    _LOGGER.debug(f"[Device {device_id}] Setting up {device_type} sensors.")
 
-# Sleep tracker specific sensors
-class EnvironmentTemperatureSensor(CoordinatorEntity, SensorEntity):
-    """Representation of a sensor that indicates the environment temperature."""
+    device_info = build_device_info(device_data)
+    sensors = [
+        SleepMeSensor(coordinator, description, device_info, device_id, name, device_type)
+        for description in SENSOR_DESCRIPTIONS
+        if device_type in description.device_types
+    ]
 
-    def __init__(self, coordinator, device_info, device_id, name):
-        super().__init__(coordinator)
-        self._device_id = device_id
-        self._attr_name = f"Sleep Tracker {name} Environment Temperature"
-        self._attr_unique_id = f"{DOMAIN}_{device_id}_environment_temperature"
-        self._attr_icon = "mdi:thermometer"
-        self._attr_device_class = SensorDeviceClass.TEMPERATURE
-        self._attr_native_unit_of_measurement = UnitOfTemperature.FAHRENHEIT
-        self._attr_device_info = device_info
+    analytics = hass.data[DOMAIN].get(f"{device_id}_analytics")
+    if analytics is not None:
+        sensors.extend(
+            SleepMeNightlySensor(analytics, description, device_info, name, device_type)
+            for description in NIGHTLY_SENSOR_DESCRIPTIONS
+            if device_type in description.device_types
+        )
 
-    @property
-    def state(self):
-        """Return the environment temperature in Fahrenheit."""
-        return self.coordinator.data.get("status", {}).get("environment_temperature_f")
+    _LOGGER.debug(f"[Device {device_id}] Adding {len(sensors)} sensors for {device_type}")
+    return sensors
 
-class EnvironmentHumiditySensor(CoordinatorEntity, SensorEntity):
-    """Representation of a sensor that indicates the environment humidity."""
+class SleepMeSensor(SleepMeEntity, SensorEntity):
+    """A SleepMe sensor driven by a SleepMeSensorEntityDescription."""
 
-    def __init__(self, coordinator, device_info, device_id, name):
-        super().__init__(coordinator)
-        self._device_id = device_id
-        self._attr_name = f"Sleep Tracker {name} Environment Humidity"
-        self._attr_unique_id = f"{DOMAIN}_{device_id}_environment_humidity"
-        self._attr_icon = "mdi:water-percent"
-        self._attr_device_class = SensorDeviceClass.HUMIDITY
-        self._attr_native_unit_of_measurement = PERCENTAGE
-        self._attr_device_info = device_info
+    entity_description: SleepMeSensorEntityDescription
+    _value_attr = "_attr_native_value"
 
-    @property
-    def state(self):
-        """Return the environment humidity percentage."""
-        return self.coordinator.data.get("status", {}).get("environment_humidity")
+class SleepMeNightlySensor(RestoreSensor):
+    """A summary of last night, updated each morning by the device's nightly analytics."""
 
-class BedTemperatureSensor(CoordinatorEntity, SensorEntity):
-    """Representation of a sensor that indicates the bed temperature."""
+    entity_description: SleepMeNightlySensorEntityDescription
+    _attr_should_poll = False
 
-    def __init__(self, coordinator, device_info, device_id, name):
-        super().__init__(coordinator)
-        self._device_id = device_id
-        self._attr_name = f"Sleep Tracker {name} Bed Temperature"
-        self._attr_unique_id = f"{DOMAIN}_{device_id}_bed_temperature"
-        self._attr_icon = "mdi:bed"
-        self._attr_device_class = SensorDeviceClass.TEMPERATURE
-        self._attr_native_unit_of_measurement = UnitOfTemperature.FAHRENHEIT
+    def __init__(self, analytics, description, device_info, name, device_type):
+        self.entity_description = description
+        self._analytics = analytics
+        self._attr_name = f"{device_label(device_type)} {name} {description.name}"
+        self._attr_unique_id = f"{DOMAIN}_{analytics.device_id}_{description.key}"
         self._attr_device_info = device_info
 
-    @property
-    def state(self):
-        """Return the bed temperature in Fahrenheit."""
-        return self.coordinator.data.get("status", {}).get("bed_temperature_f")
\ No newline at end of file
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        # Keep showing the previous night across restarts until the next run
+        last = await self.async_get_last_sensor_data()
+        if last is not None:
+            self._attr_native_value = last.native_value
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass, SIGNAL_ANALYTICS_UPDATED.format(self._analytics.device_id), self._handle_results
+            )
+        )
+
+    @callback
+    def _handle_results(self) -> None:
+        self._attr_native_value = self._analytics.results.get(self.entity_description.key)
+        self._attr_extra_state_attributes = {"night_end": self._analytics.results.get("night_end")}
+        self.async_write_ha_state()
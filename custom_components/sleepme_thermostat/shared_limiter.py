@@ -0,0 +1,99 @@
+"""Rate limiting shared between processes through a SQLite database."""
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import time
+
+_LOGGER = logging.getLogger(__name__)
+
+MIN_RETRY_WAIT = 0.1  # seconds
+
+class SqliteRateLimiter:
+    """Sliding-window limiter whose window lives in a SQLite file on shared storage.
+
+    Every process that uses the same database and token draws from one budget
+    of ``max_requests`` per ``interval``. ``instance_quota`` caps how much of
+    that budget one instance may hold at a time, so a busy instance cannot
+    starve the others. SQLite's write lock serializes the check and insert, so
+    a slot is claimed atomically. Drop-in replacement for ``RateLimiter``.
+    """
+
+    def __init__(self, path: str, token: str, instance: str, max_requests: int = 9,
+                 interval: float = 60, instance_quota: int = None, clock=time.time, sleep=asyncio.sleep):
+        self.path = path
+        # Key the bucket by a hash so the token is never written to shared storage
+        self.bucket = hashlib.sha256(token.encode()).hexdigest()[:16]
+        self.instance = instance
+        self.max_requests = max_requests
+        self.interval = interval
+        self.instance_quota = instance_quota or max_requests
+        # Timestamps are compared across processes, so the clock must be wall time
+        self.clock = clock
+        self.sleep = sleep
+        self.lock = asyncio.Lock()
+        self.total_wait = 0.0
+        self.wait_count = 0
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        if not self._initialized:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS requests (bucket TEXT NOT NULL, instance TEXT NOT NULL, ts REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS requests_bucket_ts ON requests (bucket, ts)")
+            self._initialized = True
+        return connection
+
+    def try_acquire(self) -> float:
+        """Claim a slot if one is free. Returns 0 on success, else seconds until one might be. Blocking."""
+        connection = self._connect()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            now = self.clock()
+            connection.execute("DELETE FROM requests WHERE ts <= ?", (now - self.interval,))
+            rows = connection.execute(
+                "SELECT instance, ts FROM requests WHERE bucket = ? ORDER BY ts", (self.bucket,)
+            ).fetchall()
+            mine = [ts for instance, ts in rows if instance == self.instance]
+
+            if len(rows) < self.max_requests and len(mine) < self.instance_quota:
+                connection.execute(
+                    "INSERT INTO requests (bucket, instance, ts) VALUES (?, ?, ?)", (self.bucket, self.instance, now)
+                )
+                connection.execute("COMMIT")
+                return 0.0
+
+            connection.execute("COMMIT")
+            oldest = mine[0] if len(mine) >= self.instance_quota else rows[0][1]
+            return max(MIN_RETRY_WAIT, oldest + self.interval - now)
+        except sqlite3.Error:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            raise
+        finally:
+            connection.close()
+
+    async def acquire(self, request_id: str = "") -> float:
+        """Wait for a free slot in the shared window and claim it. Returns the time waited."""
+        loop = asyncio.get_running_loop()
+        waited = 0.0
+        async with self.lock:
+            while True:
+                try:
+                    wait_time = await loop.run_in_executor(None, self.try_acquire)
+                except sqlite3.Error as err:
+                    # Never block requests because shared storage is unavailable
+                    _LOGGER.warning(f"[{request_id}] Shared rate limiter unavailable ({err}), proceeding without it.")
+                    break
+                if wait_time <= 0:
+                    break
+                _LOGGER.debug(f"[{request_id}] Shared rate limiting: waiting for {wait_time:.2f} seconds.")
+                waited += wait_time
+                await self.sleep(wait_time)
+
+        if waited:
+            self.total_wait += waited
+            self.wait_count += 1
+        return waited
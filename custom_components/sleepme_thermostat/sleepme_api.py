@@ -6,30 +6,57 @@ from collections import deque
 
 _LOGGER = logging.getLogger(__name__)
 
+class RateLimiter:
+    """Sliding-window limiter allowing a fixed number of requests per interval."""
+
+    def __init__(self, max_requests: int, interval: float = 60, clock=time.time, sleep=asyncio.sleep):
+        self.request_times = deque(maxlen=max_requests)
+        self.interval = interval
+        self.clock = clock
+        self.sleep = sleep
+        self.lock = asyncio.Lock()
+        self.total_wait = 0.0
+        self.wait_count = 0
+
+    async def acquire(self, request_id: str = "") -> float:
+        """Wait for a free slot in the window and claim it. Returns the time waited."""
+        async with self.lock:
+            current_time = self.clock()
+            wait_time = 0.0
+
+            if len(self.request_times) == self.request_times.maxlen and current_time - self.request_times[0] < self.interval:
+                wait_time = self.interval - (current_time - self.request_times[0])
+                _LOGGER.debug(f"[{request_id}] Rate limiting: waiting for {wait_time:.2f} seconds.")
+                self.total_wait += wait_time
+                self.wait_count += 1
+                await self.sleep(wait_time)
+                current_time = self.clock()
+
+            # Add the current time to the deque
+            self.request_times.append(current_time)
+            return wait_time
+
 class SleepMeAPI:
-    def __init__(self, api_url: str, token: str, max_requests_per_minute=9):
+    def __init__(self, api_url: str, token: str, max_requests_per_minute=9, transport=None, clock=time.time, sleep=asyncio.sleep, client=None, limiter=None):
         self.api_url = api_url
         self.token = token
-        self.client = httpx.AsyncClient()
-        self.request_times = deque(maxlen=max_requests_per_minute)
-        self.rate_limit_interval = 60  # seconds
+        # A client passed in (e.g. Home Assistant's shared one) is not ours to close
+        self._owns_client = client is None
+        if client is not None:
+            self.client = client
+        else:
+            self.client = httpx.AsyncClient(transport=transport) if transport else httpx.AsyncClient()
+        self.clock = clock
+        self.sleep = sleep
+        # Any object with an async acquire(request_id), e.g. a SqliteRateLimiter shared between processes
+        self.limiter = limiter or RateLimiter(max_requests_per_minute, 60, clock=clock, sleep=sleep)
 
     async def api_request(self, method: str, endpoint: str, params=None, data=None, input_headers=None, retries=3):
         """Handles rate limiting, retries, and calls perform_request."""
-        request_id = f"{method.upper()}-{endpoint}-{int(time.time())}"
+        request_id = f"{method.upper()}-{endpoint}-{int(self.clock())}"
         _LOGGER.debug(f"[{request_id}] Starting API request with {retries} retries remaining.")
 
-        async with asyncio.Lock():
-            current_time = time.time()
-
-            # Rate limiting logic
-            if len(self.request_times) == self.request_times.maxlen and current_time - self.request_times[0] < self.rate_limit_interval:
-                wait_time = self.rate_limit_interval - (current_time - self.request_times[0])
-                _LOGGER.debug(f"[{request_id}] Rate limiting: waiting for {wait_time:.2f} seconds before making {method.upper()} request to {endpoint}.")
-                await asyncio.sleep(wait_time)
-
-            # Add the current time to the deque
-            self.request_times.append(current_time)
+        await self.limiter.acquire(request_id)
 
         # Perform the API request
         try:
@@ -42,7 +69,7 @@ class SleepMeAPI:
 
     async def perform_request(self, method: str, endpoint: str, params=None, data=None, input_headers=None):
         """Executes the actual API request."""
-        request_id = f"{method.upper()}-{endpoint}-{int(time.time())}"
+        request_id = f"{method.upper()}-{endpoint}-{int(self.clock())}"
         headers = input_headers or {}
         headers["Authorization"] = f"Bearer {self.token}"
 
@@ -54,7 +81,7 @@ class SleepMeAPI:
 
     async def handle_error(self, error, method: str, endpoint: str, params=None, data=None, input_headers=None, retries=3):
         """Classifies errors and applies backoff before retrying if necessary."""
-        request_id = f"{method.upper()}-{endpoint}-{int(time.time())}"
+        request_id = f"{method.upper()}-{endpoint}-{int(self.clock())}"
 
         if retries <= 0:
             # Log specific error types even when not retrying
@@ -104,13 +131,15 @@ class SleepMeAPI:
         else:
             _LOGGER.warning(f"[{request_id}] API error: {error}. Retrying in {backoff_time}s. Attempts left: {retries-1}")
 
-        await asyncio.sleep(backoff_time)
+        await self.sleep(backoff_time)
 
         # Retry the API request with one less retry
         return await self.api_request(method, endpoint, params=params, data=data, input_headers=input_headers, retries=retries-1)
 
     async def close(self):
         """Close the httpx client."""
+        if not self._owns_client:
+            return
         _LOGGER.debug("Closing HTTP client...")
         await self.client.aclose()
         _LOGGER.debug("HTTP client closed.")
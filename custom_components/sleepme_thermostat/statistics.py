@@ -0,0 +1,132 @@
+"""Aggregate noisy readings in memory and import them as external long-term statistics."""
+import logging
+from datetime import datetime, timedelta
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import async_add_external_statistics
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_change
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util, slugify
+from .const import DOMAIN
+from .entity import device_label
+from .sensor import statistic_descriptions
+
+_LOGGER = logging.getLogger(__name__)
+
+BUCKET = timedelta(minutes=5)
+STORAGE_VERSION = 1
+
+def storage_key(device_id: str) -> str:
+    return f"{DOMAIN}.statistics.{device_id}"
+
+def _bucket_start(moment: datetime, size: timedelta) -> datetime:
+    seconds = int(size.total_seconds())
+    timestamp = int(moment.timestamp())
+    return dt_util.utc_from_timestamp(timestamp - timestamp % seconds)
+
+class SleepMeStatisticsAggregator:
+    """Folds each poll into 5-minute mean/min/max buckets and imports hourly statistics.
+
+    Readings are aggregated into 5-minute buckets as they arrive. Shortly
+    after each hour, the finished buckets are rolled up into one hourly
+    mean/min/max per field and imported in a single call, as external
+    statistics such as ``sleepme_thermostat:<device>_water_temperature``.
+    The recorder only accepts hourly external statistics, so the 5-minute
+    buckets exist only in memory. The buckets of the unfinished hour are
+    stored on stop and restored on start, since importing a partial hour
+    would be overwritten by the rest of it after a reload.
+    """
+
+    def __init__(self, hass: HomeAssistant, coordinator, device_data: dict):
+        self.hass = hass
+        self.coordinator = coordinator
+        self.device_id = device_data.get("device_id")
+        self.descriptions = statistic_descriptions(device_data.get("device_type", "sleep_pad"))
+        self._label = f"{device_label(device_data.get('device_type', 'sleep_pad'))} {device_data.get('name')}"
+        # key -> {bucket start: [count, total, minimum, maximum]}
+        self._buckets = {description.key: {} for description in self.descriptions}
+        self._store = Store(hass, STORAGE_VERSION, storage_key(self.device_id))
+        self._unsubs = []
+
+    def statistic_id(self, key: str) -> str:
+        return f"{DOMAIN}:{slugify(self.device_id)}_{key}"
+
+    async def async_start(self) -> None:
+        """Restore the buckets left open by the last stop and start collecting."""
+        stored = await self._store.async_load()
+        for key, rows in (stored or {}).get("buckets", {}).items():
+            if key not in self._buckets:
+                continue
+            for start, count, total, minimum, maximum in rows:
+                self._buckets[key][dt_util.parse_datetime(start)] = [count, total, minimum, maximum]
+
+        for description in self.descriptions:
+            # Registered here too, as the raw sensor entity may be disabled
+            self.coordinator.register_value(description.key, description.section, description.field, description.value_fn)
+        self._unsubs.append(self.coordinator.async_add_listener(self._handle_update))
+        self._unsubs.append(async_track_time_change(self.hass, self._handle_hour, minute=1, second=0))
+
+    async def async_stop(self) -> None:
+        """Stop collecting, import the finished hours and store the buckets of the current one."""
+        while self._unsubs:
+            self._unsubs.pop()()
+        self._async_import(dt_util.utcnow())
+        await self._store.async_save({
+            "buckets": {
+                key: [[start.isoformat(), *bucket] for start, bucket in buckets.items()]
+                for key, buckets in self._buckets.items()
+            }
+        })
+
+    @callback
+    def _handle_update(self) -> None:
+        start = _bucket_start(dt_util.utcnow(), BUCKET)
+        for key, buckets in self._buckets.items():
+            value = self.coordinator.values.get(key)
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                continue
+            bucket = buckets.get(start)
+            if bucket is None:
+                buckets[start] = [1, value, value, value]
+            else:
+                bucket[0] += 1
+                bucket[1] += value
+                bucket[2] = min(bucket[2], value)
+                bucket[3] = max(bucket[3], value)
+
+    @callback
+    def _handle_hour(self, now: datetime) -> None:
+        self._async_import(now)
+
+    @callback
+    def _async_import(self, now: datetime) -> None:
+        """Roll every complete hour of 5-minute buckets into hourly statistics and import them."""
+        current_hour = _bucket_start(now, timedelta(hours=1))
+        for description in self.descriptions:
+            buckets = self._buckets[description.key]
+            hours = {}
+            for start in [start for start in buckets if start < current_hour]:
+                count, total, minimum, maximum = buckets.pop(start)
+                hour = hours.setdefault(_bucket_start(start, timedelta(hours=1)), [0, 0.0, minimum, maximum])
+                hour[0] += count
+                hour[1] += total
+                hour[2] = min(hour[2], minimum)
+                hour[3] = max(hour[3], maximum)
+
+            if not hours:
+                continue
+
+            metadata = StatisticMetaData(
+                has_mean=True,
+                has_sum=False,
+                name=f"{self._label} {description.name}",
+                source=DOMAIN,
+                statistic_id=self.statistic_id(description.key),
+                unit_of_measurement=description.native_unit_of_measurement,
+            )
+            statistics = [
+                StatisticData(start=start, mean=total / count, min=minimum, max=maximum)
+                for start, (count, total, minimum, maximum) in sorted(hours.items())
+            ]
+            _LOGGER.debug(f"[Device {self.device_id}] Importing {len(statistics)} hours of {description.key} statistics.")
+            async_add_external_statistics(self.hass, metadata, statistics)
@@ -1,20 +1,57 @@
 import logging
+import time
+from typing import Callable
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from datetime import timedelta
 from .sleepme import SleepMeClient
+from .sleepme_api import SleepMeAPI
+from .command_queue import SleepMeCommandQueue
 
 _LOGGER = logging.getLogger(__name__)
 
+# Fields of the "about" block that only change with firmware updates or hardware swaps
+METADATA_FIELDS = ("firmware_version", "mac_address", "model", "serial_number")
+# Fields of the "about" block that can change between polls, kept in each snapshot for their sensors
+VOLATILE_ABOUT_FIELDS = ("ip_address", "lan_address")
+
 class SleepMeUpdateManager(DataUpdateCoordinator):
     """Manages data updates for SleepMe devices."""
 
-    def __init__(self, hass: HomeAssistant, api_url: str, token: str, device_id: str):
-        self.client = SleepMeClient(api_url, token, device_id)
+    def __init__(self, hass: HomeAssistant, api_url: str, token: str, device_id: str, api: SleepMeAPI = None):
+        self.client = SleepMeClient(api_url, token, device_id, api=api)
         self.device_id = device_id
 
+        # Commands that could not be delivered, replayed once the API answers again
+        self.commands = SleepMeCommandQueue(hass, self.client, device_id)
+
         # Initialize the last known good status as None
         self._last_valid_status = None
+        # API clock timestamp of the last successful update, used to judge staleness
+        self.last_valid_time = None
+
+        # The static METADATA_FIELDS live here rather than in each snapshot, and
+        # the metadata listeners only run when one of them changes
+        self.metadata = {}
+        self._metadata_listeners = []
+
+        # Entity values extracted once per snapshot, keyed by entity description key
+        self._value_fields = {}
+        self.values = {}
+
+        # Publish filtering for noisy entities, all keyed by entity key: deadband overrides,
+        # the shortest and longest time between writes, and how many writes each entity skipped
+        self.deadbands = {}
+        self.min_publish_intervals = {}
+        self.max_publish_intervals = {}
+        self.suppressed_writes = {}
+
+        # Offset in the poll interval assigned by the poll planner, and when the last poll started (loop time)
+        self.poll_phase = None
+        self._last_poll = None
+
+        # Event-loop thread CPU time spent fanning each update out to the entities
+        self.fanout_stats = {"cycles": 0, "cpu_total": 0.0, "cpu_max": 0.0, "cpu_last": 0.0}
 
         # Set the update interval to 60 seconds
         update_interval = timedelta(seconds=60)
@@ -26,8 +63,85 @@ class SleepMeUpdateManager(DataUpdateCoordinator):
             update_interval=update_interval,
         )
 
+    @callback
+    def register_value(self, key: str, section: str, field: str, value_fn=None) -> None:
+        """Register a field to extract from each snapshot for the entity with the given key."""
+        self._value_fields[key] = (section, field, value_fn)
+        self.values[key] = self._extract_value(self.data or {}, section, field, value_fn)
+
+    @callback
+    def async_set_poll_phase(self, phase: float, interval: float) -> None:
+        """Poll every ``interval`` seconds at ``phase`` within it, moving the already scheduled poll."""
+        self.poll_phase = phase
+        self.update_interval = timedelta(seconds=interval)
+        # Without listeners nothing is scheduled yet; the first listener schedules at the phase
+        if self._unsub_refresh is not None:
+            self._schedule_refresh()
+
+    @callback
+    def _schedule_refresh(self) -> None:
+        """Schedule the next poll, at the planned phase when there is one.
+
+        The next poll is the first phase point at least one interval after the
+        last poll, so a new plan never makes the device poll twice in one interval.
+        """
+        super()._schedule_refresh()
+        if self.poll_phase is None or self._unsub_refresh is None:
+            return
+
+        self._unsub_refresh()
+        loop = self.hass.loop
+        interval = self.update_interval.total_seconds()
+        earliest = max(loop.time(), (self._last_poll or 0) + interval)
+        next_poll = earliest + (self.poll_phase - earliest) % interval
+        self._unsub_refresh = loop.call_at(next_poll, self.hass.async_run_hass_job, self._job).cancel
+
+    @callback
+    def async_add_metadata_listener(self, update_callback) -> Callable[[], None]:
+        """Call ``update_callback(metadata)`` when the device's static metadata changes. Returns a remover."""
+        self._metadata_listeners.append(update_callback)
+
+        def remove_listener() -> None:
+            self._metadata_listeners.remove(update_callback)
+
+        return remove_listener
+
+    @callback
+    def _refresh_metadata(self, about: dict) -> None:
+        """Take the static fields from an "about" block and notify the metadata listeners."""
+        metadata = {field: about.get(field) for field in METADATA_FIELDS}
+        _LOGGER.debug(f"[Device {self.device_id}] Device metadata is now {metadata}.")
+        self.metadata = metadata
+        for update_callback in list(self._metadata_listeners):
+            update_callback(metadata)
+
+    @staticmethod
+    def _extract_value(data: dict, section: str, field: str, value_fn):
+        value = data.get(section, {}).get(field)
+        return value_fn(value) if value_fn else value
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Extract entity values from the snapshot and update all listeners, timing the fan-out."""
+        start = time.thread_time()
+        data = self.data or {}
+        self.values = {
+            key: self._extract_value(data, section, field, value_fn)
+            for key, (section, field, value_fn) in self._value_fields.items()
+        }
+        super().async_update_listeners()
+        elapsed = time.thread_time() - start
+
+        stats = self.fanout_stats
+        stats["cycles"] += 1
+        stats["cpu_total"] += elapsed
+        stats["cpu_last"] = elapsed
+        if elapsed > stats["cpu_max"]:
+            stats["cpu_max"] = elapsed
+
     async def _async_update_data(self):
         """Fetch the latest data from the SleepMe API."""
+        self._last_poll = self.hass.loop.time()
         try:
             # Fetch device status from the API
             device_status = await self.client.get_device_status()
@@ -48,12 +162,22 @@ class SleepMeUpdateManager(DataUpdateCoordinator):
                     "about": {},
                 }
 
+            about = device_status.get("about", {})
+            metadata = self.metadata
+            if about and any(about.get(field) != metadata.get(field) for field in METADATA_FIELDS):
+                self._refresh_metadata(about)
+
             # Cache the current valid status
             self._last_valid_status = {
                 "status": device_status.get("status", {}),
                 "control": device_status.get("control", {}),
-                "about": device_status.get("about", {}),
+                "about": {field: about.get(field) for field in VOLATILE_ABOUT_FIELDS},
             }
+            self.last_valid_time = self.client.api.clock()
+
+            # The API is reachable again, so deliver anything queued during the outage
+            if self.commands.pending:
+                self.hass.async_create_task(self._async_replay_commands())
 
             return self._last_valid_status
 
@@ -72,3 +196,17 @@ class SleepMeUpdateManager(DataUpdateCoordinator):
                 "control": {},
                 "about": {},
             }
+
+    async def _async_replay_commands(self) -> None:
+        """Deliver queued commands and show the delivered values without waiting for the next poll."""
+        delivered = await self.commands.async_replay()
+        if delivered and self.data:
+            self.data["control"].update(delivered)
+            self.async_update_listeners()
+
+    @property
+    def data_age(self):
+        """Seconds since the last successful update, or None if there has never been one."""
+        if self.last_valid_time is None:
+            return None
+        return self.client.api.clock() - self.last_valid_time
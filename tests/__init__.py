@@ -0,0 +1 @@
+"""Tests for the SleepMe Thermostat integration."""
@@ -0,0 +1,41 @@
+"""Helpers for driving the integration against replayed API traffic."""
+from custom_components.sleepme_thermostat.cassette import ReplayTransport, VirtualClock
+from custom_components.sleepme_thermostat.const import API_URL
+from custom_components.sleepme_thermostat.sleepme_api import SleepMeAPI
+
+DEVICE_ID = "test-device"
+DEVICE_PATH = f"/v1/devices/{DEVICE_ID}"
+
+def device_status(water_temperature_f: int = 72) -> dict:
+    """Return a sleep pad status shaped like the API's."""
+    return {
+        "about": {
+            "firmware_version": "5.39.2134",
+            "ip_address": "10.0.0.2",
+            "lan_address": "10.0.0.2",
+            "mac_address": "02:00:00:00:00:01",
+            "model": "DP999NA",
+            "serial_number": "TEST000001",
+        },
+        "control": {
+            "set_temperature_c": 21.5,
+            "set_temperature_f": 71,
+            "thermal_control_status": "active",
+        },
+        "status": {
+            "is_connected": True,
+            "is_water_low": False,
+            "water_level": 100,
+            "water_temperature_f": water_temperature_f,
+        },
+    }
+
+def interaction(status: int = 200, response=None, method: str = "GET", path: str = DEVICE_PATH, **extra) -> dict:
+    """Return one cassette interaction."""
+    return {"method": method, "path": path, "status": status, "latency": 0, "response": response, **extra}
+
+def replay_api(interactions: list, clock: VirtualClock) -> tuple:
+    """Return a SleepMeAPI answering from ``interactions`` on ``clock``, and its transport."""
+    transport = ReplayTransport(interactions, clock)
+    api = SleepMeAPI(API_URL, "test-token", transport=transport, clock=clock.time, sleep=clock.sleep)
+    return api, transport
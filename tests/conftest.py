@@ -0,0 +1,14 @@
+"""Shared fixtures for the SleepMe Thermostat tests."""
+import pytest
+from custom_components.sleepme_thermostat.cassette import VirtualClock
+
+pytest_plugins = "pytest_homeassistant_custom_component"
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    """Let Home Assistant load the integration from custom_components."""
+    yield
+
+@pytest.fixture
+def clock():
+    return VirtualClock(start=1_700_000_000.0)
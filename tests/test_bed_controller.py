@@ -0,0 +1,59 @@
+"""The bed controller's write bound, deadband, quantization and anti-windup."""
+import random
+from custom_components.sleepme_thermostat.bed_controller import BedTemperatureController, max_writes_per_hour
+
+SAMPLE_INTERVAL = 10  # seconds between tracker samples
+
+def controller(**kwargs) -> BedTemperatureController:
+    return BedTemperatureController(12.5, 46.5, **kwargs)
+
+def test_writes_per_hour_are_bounded_under_noise():
+    rng = random.Random(0)
+    for min_write_interval in (60, 300, 900):
+        bed = controller(min_write_interval=min_write_interval, deadband=0.1)
+        writes = []
+        target = 30.0
+        for step in range(6 * 3600 // SAMPLE_INTERVAL):
+            now = step * SAMPLE_INTERVAL
+            if step % 90 == 0:
+                target = rng.choice([26.0, 30.0, 34.0])
+            if bed.update(target, target + rng.uniform(-5, 5), now, current_setpoint=30.0) is not None:
+                writes.append(now)
+
+        assert writes
+        bound = max_writes_per_hour(min_write_interval)
+        for start in writes:
+            assert sum(1 for t in writes if start <= t < start + 3600) <= bound
+        assert all(later - earlier >= min_write_interval for earlier, later in zip(writes, writes[1:]))
+
+def test_deadband_holds_setpoint():
+    bed = controller(deadband=0.5)
+    bed.update(30.0, 30.0, 0, current_setpoint=30.0)
+    for step in range(1, 100):
+        assert bed.update(30.0, 30.0 + (0.5 if step % 2 else -0.5), step * SAMPLE_INTERVAL) is None
+    assert bed.integral == 0.0
+    assert bed.last_write_time is None
+
+def test_output_is_quantized_and_clamped():
+    bed = controller(min_write_interval=0, deadband=0.0)
+    outputs = [bed.update(30.0, measured / 10, index) for index, measured in enumerate(range(0, 500, 7))]
+    outputs = [output for output in outputs if output is not None]
+
+    assert outputs
+    assert all(output * 2 == int(output * 2) for output in outputs)
+    assert all(12.5 <= output <= 46.5 for output in outputs)
+    # A setpoint is only written when the quantized value changes
+    assert all(earlier != later for earlier, later in zip(outputs, outputs[1:]))
+
+def test_integral_does_not_wind_up_while_saturated():
+    bed = controller(min_write_interval=0)
+    # A 20C error drives the proportional term alone past the maximum setpoint
+    for step in range(360):
+        output = bed.update(30.0, 10.0, step * SAMPLE_INTERVAL)
+        assert output in (None, 46.5)
+    assert bed.integral == 0.0
+
+    # Inside the range the integral does build up
+    for step in range(360, 720):
+        bed.update(30.0, 28.0, step * SAMPLE_INTERVAL)
+    assert bed.integral > 0.0
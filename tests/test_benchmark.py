@@ -0,0 +1,44 @@
+"""The on-demand benchmarks run against stand-ins and report their measurements."""
+from custom_components.sleepme_thermostat import benchmark
+from custom_components.sleepme_thermostat.const import DOMAIN
+
+async def test_fanout_benchmark_counts_writes_without_polling(hass, tmp_path, monkeypatch):
+    monkeypatch.setattr(hass.config, "config_dir", str(tmp_path))
+    hass.data[DOMAIN] = {"pad_update_manager": object()}
+    scheduled = []
+    schedule_refresh = benchmark.SleepMeUpdateManager._schedule_refresh
+
+    def _record_schedule(manager):
+        schedule_refresh(manager)
+        scheduled.append(manager._unsub_refresh)
+
+    monkeypatch.setattr(benchmark.SleepMeUpdateManager, "_schedule_refresh", _record_schedule)
+
+    result = await benchmark.async_run_benchmark(hass, cycles=3, interval=0)
+
+    assert result["devices"] == 1
+    assert result["cycles"] == 3
+    assert result["state_writes_per_cycle"] > 0
+    # The stand-ins never schedule a poll of their own
+    assert scheduled
+    assert all(unsub is None for unsub in scheduled)
+    assert (tmp_path / benchmark.BENCHMARK_RESULTS_FILE).exists()
+
+async def test_analytics_benchmark_parses_recorder_rows(hass, tmp_path, monkeypatch):
+    monkeypatch.setattr(hass.config, "config_dir", str(tmp_path))
+
+    result = await benchmark.async_run_analytics_benchmark(hass, devices=1, days=3)
+
+    assert result["rows"] > 0
+    assert result["per_night_ms"] > 0
+
+async def test_setup_benchmark_reports_loop_blocking(hass, tmp_path, monkeypatch):
+    monkeypatch.setattr(hass.config, "config_dir", str(tmp_path))
+    hass.data[DOMAIN] = {}
+
+    result = await benchmark.async_run_setup_benchmark(hass, entries=3)
+
+    assert result["entries"] == 3
+    assert result["entities"] > 0
+    assert 0 < result["blocking_max_step_ms"] <= result["blocking_max_entry_ms"] <= result["blocking_total_ms"]
+    assert not benchmark.get_update_managers(hass)
@@ -0,0 +1,58 @@
+"""Recorded cassettes are redacted and replay with their status codes and latencies."""
+import json
+import httpx
+from custom_components.sleepme_thermostat.cassette import REDACTED, RecordingTransport, ReplayTransport
+from custom_components.sleepme_thermostat.const import API_URL
+from custom_components.sleepme_thermostat.sleepme_api import SleepMeAPI
+from .common import DEVICE_ID, device_status
+
+TOKEN = "secret-token"
+LATENCIES = {"GET": 0.25, "PATCH": 1.5}
+
+class FakeClock:
+    """Monotonic clock that the mock server advances by each request's latency."""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+def mock_server(clock: FakeClock) -> httpx.MockTransport:
+    def handle(request: httpx.Request) -> httpx.Response:
+        clock.now += LATENCIES[request.method]
+        if request.method == "PATCH":
+            return httpx.Response(503, json={})
+        return httpx.Response(200, json=device_status())
+    return httpx.MockTransport(handle)
+
+async def test_recorded_cassette_is_redacted_and_replays(tmp_path, clock):
+    server_clock = FakeClock()
+    recorder = RecordingTransport(mock_server(server_clock), clock=server_clock)
+    api = SleepMeAPI(API_URL, TOKEN, transport=recorder)
+    assert await api.api_request("GET", f"devices/{DEVICE_ID}") == device_status()
+    assert await api.api_request("PATCH", f"devices/{DEVICE_ID}", data={"set_temperature_c": 20.0}, retries=0) == {}
+    await api.close()
+
+    path = tmp_path / "cassette.json"
+    recorder.save(str(path))
+    saved = path.read_text()
+    assert TOKEN not in saved
+    for secret in ("02:00:00:00:00:01", "TEST000001", "10.0.0.2"):
+        assert secret not in saved
+    about = json.loads(saved)["interactions"][0]["response"]["about"]
+    assert about["mac_address"] == REDACTED
+    assert about["model"] == "DP999NA"
+
+    transport = ReplayTransport.load(str(path), clock)
+    assert [(entry["status"], entry["latency"]) for entry in json.loads(saved)["interactions"]] == [(200, 0.25), (503, 1.5)]
+    started = clock.time()
+    async with httpx.AsyncClient(transport=transport) as client:
+        status = await client.get(f"{API_URL}/devices/{DEVICE_ID}")
+        patch = await client.patch(f"{API_URL}/devices/{DEVICE_ID}", json={"set_temperature_c": 20.0})
+    assert status.status_code == 200
+    assert status.json()["control"] == device_status()["control"]
+    assert status.json()["about"]["serial_number"] == REDACTED
+    assert patch.status_code == 503
+    assert clock.time() - started == sum(LATENCIES.values())
+    assert transport.remaining == 0
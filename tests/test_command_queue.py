@@ -0,0 +1,87 @@
+"""Queued commands: latest value wins, they survive a restart and are replayed after an outage."""
+import asyncio
+from homeassistant.helpers import device_registry as dr
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from custom_components.sleepme_thermostat import async_remove_entry
+from custom_components.sleepme_thermostat.command_queue import SleepMeCommandQueue, storage_key
+from custom_components.sleepme_thermostat.const import API_URL, DOMAIN, ENTRY_TYPE_FLEET
+from custom_components.sleepme_thermostat.sleepme import SleepMeClient
+from custom_components.sleepme_thermostat.update_manager import SleepMeUpdateManager
+from .common import DEVICE_ID, device_status, interaction, replay_api
+
+def patch(status: int, response=None) -> dict:
+    return interaction(status, response, method="PATCH")
+
+def queue_for(hass, api) -> SleepMeCommandQueue:
+    return SleepMeCommandQueue(hass, SleepMeClient(API_URL, "test-token", DEVICE_ID, api=api), DEVICE_ID)
+
+async def test_outage_keeps_only_the_latest_value(hass, hass_storage, clock):
+    api, transport = replay_api([patch(503) for _ in range(3)], clock)
+    queue = queue_for(hass, api)
+
+    for temperature in (20.0, 21.0, 22.0):
+        assert await queue.async_send("set_temperature_c", temperature, retries=0) is False
+
+    assert transport.request_count == 3
+    assert queue.pending == {"set_temperature_c": 22.0}
+    assert hass_storage[storage_key(DEVICE_ID)]["data"] == {"pending": {"set_temperature_c": 22.0}}
+
+async def test_pending_commands_survive_a_restart(hass, hass_storage, clock):
+    api, _ = replay_api([patch(503)], clock)
+    await queue_for(hass, api).async_send("thermal_control_status", "active", retries=0)
+
+    restarted = queue_for(hass, api)
+    await restarted.async_load()
+    assert restarted.pending == {"thermal_control_status": "active"}
+
+    await restarted.async_remove()
+    assert storage_key(DEVICE_ID) not in hass_storage
+
+async def test_successful_poll_replays_and_shows_the_delivered_value(hass, clock):
+    api, transport = replay_api([
+        patch(503),
+        interaction(200, device_status()),
+        patch(200, {"control": {"set_temperature_c": 19.5}}),
+    ], clock)
+    manager = SleepMeUpdateManager(hass, API_URL, "test-token", DEVICE_ID, api=api)
+
+    await manager.commands.async_send("set_temperature_c", 19.5, retries=0)
+    assert manager.commands.pending == {"set_temperature_c": 19.5}
+
+    await manager.async_refresh()
+    await hass.async_block_till_done()
+
+    assert transport.remaining == 0
+    assert manager.commands.pending == {}
+    assert manager.data["control"]["set_temperature_c"] == 19.5
+    await manager.async_shutdown()
+
+async def test_retry_backoff_does_not_block_newer_commands(hass, clock):
+    # The first send fails and backs off; the second is delivered meanwhile, then the first's retries fail too
+    api, _ = replay_api([patch(503), patch(200, {"control": {}}), patch(503), patch(503)], clock)
+    queue = queue_for(hass, api)
+
+    first = asyncio.create_task(queue.async_send("set_temperature_c", 20.0, retries=2))
+    await asyncio.sleep(0)
+    assert await queue.async_send("set_temperature_c", 21.0) is True
+    assert await first is False
+
+    # The stale value is not queued over the delivered one
+    assert queue.pending == {}
+
+async def test_removing_a_fleet_entry_deletes_its_devices_queues(hass, hass_storage):
+    fleet = MockConfigEntry(domain=DOMAIN, data={"api_token": "test-token", "entry_type": ENTRY_TYPE_FLEET})
+    standalone = MockConfigEntry(domain=DOMAIN, data={"api_token": "test-token", "device_id": "handed-over"})
+    fleet.add_to_hass(hass)
+    standalone.add_to_hass(hass)
+    registry = dr.async_get(hass)
+    for device_id in ("fleet-a", "fleet-b", "handed-over"):
+        registry.async_get_or_create(config_entry_id=fleet.entry_id, identifiers={(DOMAIN, device_id)})
+        hass_storage[storage_key(device_id)] = {"version": 1, "data": {"pending": {}}}
+    registry.async_get_or_create(config_entry_id=standalone.entry_id, identifiers={(DOMAIN, "handed-over")})
+
+    await async_remove_entry(hass, fleet)
+
+    assert storage_key("fleet-a") not in hass_storage
+    assert storage_key("fleet-b") not in hass_storage
+    assert storage_key("handed-over") in hass_storage
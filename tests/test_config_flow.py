@@ -0,0 +1,61 @@
+"""The options flow opens for device entries and stores what is submitted."""
+from homeassistant.data_entry_flow import FlowResultType
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from custom_components.sleepme_thermostat.const import (
+    DOMAIN,
+    API_URL,
+    ENTRY_TYPE_FLEET,
+    CONF_BED_CONTROLLER_TRACKER,
+    CONF_EXCLUDE_RAW_SENSORS,
+    CONF_NIGHTLY_ANALYTICS,
+    CONF_RECORD_TRAFFIC,
+)
+from .common import DEVICE_ID
+
+def pad_entry(hass) -> MockConfigEntry:
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=4,
+        title="Pad",
+        unique_id=DEVICE_ID,
+        data={"api_url": API_URL, "api_token": "test-token", "device_id": DEVICE_ID, "device_type": "sleep_pad"},
+    )
+    entry.add_to_hass(hass)
+    return entry
+
+async def test_options_flow_saves_options(hass):
+    entry = pad_entry(hass)
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    assert result["type"] == FlowResultType.FORM
+    assert result["step_id"] == "init"
+
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], {CONF_BED_CONTROLLER_TRACKER: "none", CONF_RECORD_TRAFFIC: True}
+    )
+    assert result["type"] == FlowResultType.CREATE_ENTRY
+    assert entry.options[CONF_RECORD_TRAFFIC] is True
+    assert CONF_BED_CONTROLLER_TRACKER not in entry.options
+
+async def test_options_flow_rejects_excluding_analytics_sources(hass):
+    entry = pad_entry(hass)
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], {CONF_EXCLUDE_RAW_SENSORS: True, CONF_NIGHTLY_ANALYTICS: True}
+    )
+    assert result["type"] == FlowResultType.FORM
+    assert result["errors"] == {"base": "exclude_raw_with_analytics"}
+
+async def test_fleet_entries_have_no_options(hass):
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=4,
+        title="Fleet",
+        data={"api_url": API_URL, "api_token": "test-token", "entry_type": ENTRY_TYPE_FLEET},
+    )
+    entry.add_to_hass(hass)
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    assert result["type"] == FlowResultType.ABORT
+    assert result["reason"] == "fleet_no_options"
@@ -0,0 +1,70 @@
+"""Static device metadata is tracked apart from the polled snapshot and synced to the registry."""
+from homeassistant.helpers import device_registry as dr
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from custom_components.sleepme_thermostat.const import API_URL, DOMAIN
+from custom_components.sleepme_thermostat.device_utils import _CAN_REPLACE_CONNECTIONS, async_sync_device_metadata
+from custom_components.sleepme_thermostat.update_manager import SleepMeUpdateManager
+from .common import DEVICE_ID, device_status, interaction, replay_api
+
+def with_about(**about) -> dict:
+    status = device_status()
+    status["about"].update(about)
+    return status
+
+async def test_snapshot_keeps_volatile_fields_and_metadata_changes_notify(hass, clock):
+    api, _ = replay_api([
+        interaction(200, device_status()),
+        interaction(200, with_about(ip_address="10.0.0.3")),
+        interaction(200, with_about(firmware_version="5.40.0")),
+    ], clock)
+    manager = SleepMeUpdateManager(hass, API_URL, "test-token", DEVICE_ID, api=api)
+    seen = []
+    manager.async_add_metadata_listener(seen.append)
+
+    await manager.async_refresh()
+    assert manager.data["about"] == {"ip_address": "10.0.0.2", "lan_address": "10.0.0.2"}
+    assert manager.metadata["model"] == "DP999NA"
+
+    # A new IP address is picked up without touching the metadata
+    await manager.async_refresh()
+    assert manager.data["about"]["ip_address"] == "10.0.0.3"
+    assert len(seen) == 1
+
+    # A firmware update is noticed on the very next poll
+    await manager.async_refresh()
+    assert [metadata["firmware_version"] for metadata in seen] == ["5.39.2134", "5.40.0"]
+    await manager.async_shutdown()
+
+async def test_sync_updates_registry_and_entry(hass):
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={"device_id": DEVICE_ID, "firmware_version": "5.39.2134", "model": "DP999NA"},
+    )
+    entry.add_to_hass(hass)
+    registry = dr.async_get(hass)
+    device = registry.async_get_or_create(
+        config_entry_id=entry.entry_id,
+        identifiers={(DOMAIN, DEVICE_ID)},
+        connections={(dr.CONNECTION_NETWORK_MAC, "02:00:00:00:00:01")},
+        sw_version="5.39.2134",
+        model="DP999NA",
+    )
+
+    metadata = {
+        "firmware_version": "5.40.0",
+        "mac_address": "02:00:00:00:00:02",
+        "model": "DP999NA",
+        "serial_number": None,
+    }
+    async_sync_device_metadata(hass, DEVICE_ID, metadata, entry)
+
+    device = registry.async_get(device.id)
+    assert device.sw_version == "5.40.0"
+    assert (dr.CONNECTION_NETWORK_MAC, "02:00:00:00:00:02") in device.connections
+    if _CAN_REPLACE_CONNECTIONS:
+        # The swapped unit's MAC replaces the old one
+        assert len(device.connections) == 1
+    assert entry.data["firmware_version"] == "5.40.0"
+    assert entry.data["mac_address"] == "02:00:00:00:00:02"
+    # Missing values never overwrite stored ones
+    assert "serial_number" not in entry.data
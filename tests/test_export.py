@@ -0,0 +1,39 @@
+"""Snapshots buffered while a background flush runs are still written on stop."""
+import asyncio
+import gzip
+import json
+import os
+from types import SimpleNamespace
+from custom_components.sleepme_thermostat.export import SnapshotExporter
+from .common import DEVICE_ID, device_status
+
+def read_exported(directory) -> list:
+    records = []
+    for name in sorted(os.listdir(directory)):
+        with gzip.open(os.path.join(directory, name), "rt", encoding="utf-8") as file:
+            records.extend(json.loads(line) for line in file)
+    return records
+
+async def test_stop_during_background_flush_writes_everything(hass, tmp_path):
+    coordinator = SimpleNamespace(device_id=DEVICE_ID, data=device_status(), async_add_listener=lambda _: lambda: None)
+    exporter = SnapshotExporter(hass, coordinator, str(tmp_path), batch_size=3)
+    exporter.async_start()
+
+    def update(water_temperature_f):
+        coordinator.data = device_status(water_temperature_f)
+        exporter._handle_update()
+
+    # The third snapshot starts a background flush; two more arrive while it writes
+    for water_temperature_f in range(60, 63):
+        update(water_temperature_f)
+    await asyncio.sleep(0)
+    assert exporter._flushing
+    for water_temperature_f in range(63, 65):
+        update(water_temperature_f)
+
+    await exporter.async_stop()
+
+    records = read_exported(tmp_path)
+    assert [record["status"]["water_temperature_f"] for record in records] == list(range(60, 65))
+    assert exporter.exported == 5
+    assert exporter.dropped == 0
@@ -0,0 +1,102 @@
+"""Fleet reconciles add, remove and hand over devices without reloading the entry."""
+import pytest
+from homeassistant import config_entries
+from homeassistant.helpers import device_registry as dr
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from custom_components.sleepme_thermostat.command_queue import storage_key
+from custom_components.sleepme_thermostat.const import DOMAIN, API_URL, ENTRY_TYPE_FLEET
+from custom_components.sleepme_thermostat.fleet import SleepMeFleetManager
+from custom_components.sleepme_thermostat.poll_planner import SleepMePollPlanner
+from custom_components.sleepme_thermostat.sleepme import SleepMeClient
+from .common import device_status, interaction, replay_api
+
+def listing(*device_ids) -> dict:
+    return interaction(response=[{"id": device_id, "name": device_id} for device_id in device_ids], path="/v1/devices")
+
+def status(device_id: str, code: int = 200) -> dict:
+    return interaction(code, device_status() if code == 200 else None, path=f"/v1/devices/{device_id}")
+
+@pytest.fixture
+async def fleet(hass, clock):
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=4,
+        title="Fleet",
+        data={"api_url": API_URL, "api_token": "test-token", "entry_type": ENTRY_TYPE_FLEET},
+    )
+    entry.add_to_hass(hass)
+    hass.data.setdefault(DOMAIN, {})
+    fleet = SleepMeFleetManager(hass, entry, SleepMePollPlanner(hass))
+    yield fleet
+    await fleet.async_unload()
+
+def answer(fleet, interactions: list, clock):
+    """Route the fleet's requests to the given interactions."""
+    api, transport = replay_api(interactions, clock)
+    fleet.api = api
+    fleet.client = SleepMeClient(API_URL, "test-token", api=api)
+    return transport
+
+def link_device(hass, entry_id: str, device_id: str):
+    return dr.async_get(hass).async_get_or_create(config_entry_id=entry_id, identifiers={(DOMAIN, device_id)})
+
+async def test_reconcile_adds_and_removes_devices(hass, hass_storage, clock, fleet):
+    added = []
+    fleet.async_register_platform("sensor", lambda hass, coordinator, device: [], lambda entities: added.append(entities))
+
+    answer(fleet, [listing("pad-a", "pad-b"), status("pad-a"), status("pad-b")], clock)
+    await fleet.async_reconcile()
+    assert set(fleet.devices) == {"pad-a", "pad-b"}
+    assert fleet.devices["pad-a"]["device_type"] == "sleep_pad"
+    assert len(added) == 2
+    removed_manager = hass.data[DOMAIN]["pad-b_update_manager"]
+
+    link_device(hass, fleet.entry.entry_id, "pad-b")
+    hass_storage[storage_key("pad-b")] = {"version": 1, "data": {"pending": {"set_temperature_c": 20.0}}}
+    answer(fleet, [listing("pad-a")], clock)
+    await fleet.async_reconcile()
+    assert set(fleet.devices) == {"pad-a"}
+    assert "pad-b_update_manager" not in hass.data[DOMAIN]
+    assert removed_manager._unsub_refresh is None
+    assert dr.async_get(hass).async_get_device(identifiers={(DOMAIN, "pad-b")}) is None
+    assert storage_key("pad-b") not in hass_storage
+
+async def test_failed_first_poll_is_retried_on_the_next_reconcile(hass, hass_storage, clock, fleet):
+    # Reconciles run inside the entry's context, as they do from its background tasks
+    config_entries.current_entry.set(fleet.entry)
+    on_unload = len(fleet.entry._on_unload or [])
+
+    answer(fleet, [listing("pad-a"), status("pad-a", 404)], clock)
+    await fleet.async_reconcile()
+    assert fleet.devices == {}
+    assert "pad-a_update_manager" not in hass.data[DOMAIN]
+
+    answer(fleet, [listing("pad-a"), status("pad-a")], clock)
+    await fleet.async_reconcile()
+    assert set(fleet.devices) == {"pad-a"}
+    # Managers are shut down by the fleet, not by callbacks piling up on the entry
+    assert len(fleet.entry._on_unload or []) == on_unload
+
+async def test_device_with_its_own_entry_is_handed_over(hass, hass_storage, clock, fleet):
+    answer(fleet, [listing("pad-a", "pad-b"), status("pad-a"), status("pad-b")], clock)
+    await fleet.async_reconcile()
+
+    standalone = MockConfigEntry(
+        domain=DOMAIN,
+        version=4,
+        title="Pad B",
+        unique_id="pad-b",
+        data={"api_url": API_URL, "api_token": "test-token", "device_id": "pad-b", "device_type": "sleep_pad"},
+    )
+    standalone.add_to_hass(hass)
+    link_device(hass, fleet.entry.entry_id, "pad-b")
+    link_device(hass, standalone.entry_id, "pad-b")
+    hass_storage[storage_key("pad-b")] = {"version": 1, "data": {"pending": {"set_temperature_c": 20.0}}}
+
+    answer(fleet, [listing("pad-a", "pad-b")], clock)
+    await fleet.async_reconcile()
+    assert set(fleet.devices) == {"pad-a"}
+    # The standalone entry keeps the device and its queued commands
+    device_entry = dr.async_get(hass).async_get_device(identifiers={(DOMAIN, "pad-b")})
+    assert device_entry.config_entries == {standalone.entry_id}
+    assert storage_key("pad-b") in hass_storage
@@ -0,0 +1,37 @@
+"""The loop timer counts only the time a coroutine holds the event loop."""
+import asyncio
+import time
+import pytest
+from custom_components.sleepme_thermostat.loop_timer import LoopTimer
+
+async def test_waiting_is_not_counted_as_blocking():
+    timer = LoopTimer()
+
+    async def setup():
+        time.sleep(0.02)
+        await asyncio.sleep(0.05)
+        return "done"
+
+    assert await timer.async_run(setup()) == "done"
+    assert timer.steps == 2
+    assert 0.02 <= timer.blocking < 0.05
+    assert timer.max_step >= 0.02
+    assert timer.as_dict()["wall"] >= 0.07
+
+async def test_cancellation_reaches_the_timed_coroutine():
+    timer = LoopTimer()
+    cancelled = asyncio.Event()
+
+    async def setup():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    task = asyncio.ensure_future(timer.async_run(setup()))
+    await asyncio.sleep(0)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert cancelled.is_set()
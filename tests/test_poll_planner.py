@@ -0,0 +1,39 @@
+"""Poll planning moves each coordinator's own scheduled poll to its phase."""
+from custom_components.sleepme_thermostat.const import API_URL
+from custom_components.sleepme_thermostat.poll_planner import SleepMePollPlanner
+from custom_components.sleepme_thermostat.update_manager import SleepMeUpdateManager
+
+def next_poll(manager) -> float:
+    """Loop time of the manager's scheduled poll."""
+    return manager._unsub_refresh.__self__.when()
+
+def at_phase(when: float, phase: float, interval: float) -> bool:
+    """Whether ``when`` falls on ``phase`` within the interval."""
+    drift = (when - phase) % interval
+    return min(drift, interval - drift) < 1e-6
+
+async def test_rebalance_moves_scheduled_poll_without_adding_refreshes(hass):
+    planner = SleepMePollPlanner(hass)
+    managers = [SleepMeUpdateManager(hass, API_URL, "test-token", f"device-{index}") for index in range(3)]
+    removers = [manager.async_add_listener(lambda: None) for manager in managers]
+
+    for manager in managers:
+        planner.async_register(manager)
+
+    interval = planner.poll_interval
+    for manager, offset in zip(managers, planner.offsets().values()):
+        assert manager.update_interval.total_seconds() == interval
+        assert at_phase(next_poll(manager), offset, interval)
+
+    # Removing a device replans the others by replacing their one scheduled poll
+    first = managers[0]
+    previous = first._unsub_refresh.__self__
+    planner.async_unregister(managers[1])
+    assert previous.cancelled()
+    assert managers[1].poll_phase is None
+    assert at_phase(next_poll(first), planner.offsets()[first.device_id], interval)
+
+    for remove in removers:
+        remove()
+    for manager in managers:
+        await manager.async_shutdown()
@@ -0,0 +1,98 @@
+"""Deadband filtering of sensor state writes, with per-sensor intervals."""
+from types import SimpleNamespace
+import pytest
+from custom_components.sleepme_thermostat import entity
+from custom_components.sleepme_thermostat.const import API_URL
+from custom_components.sleepme_thermostat.sensor import SENSOR_DESCRIPTIONS, SleepMeSensor
+from custom_components.sleepme_thermostat.update_manager import SleepMeUpdateManager
+from .common import DEVICE_ID, device_status
+
+WATER = next(description for description in SENSOR_DESCRIPTIONS if description.key == "water_temperature")
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+@pytest.fixture
+def monotonic(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(entity, "time", SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+@pytest.fixture
+async def manager(hass):
+    manager = SleepMeUpdateManager(hass, API_URL, "test-token", DEVICE_ID)
+    manager.data = device_status()
+    manager.min_publish_intervals = {"water_temperature": 60}
+    manager.max_publish_intervals = {"water_temperature": 600}
+    yield manager
+    await manager.async_shutdown()
+
+def water_sensor(manager):
+    """The water temperature sensor, with its state writes collected instead of sent to Home Assistant."""
+    sensor = SleepMeSensor(manager, WATER, {}, DEVICE_ID, "Pad", "sleep_pad")
+    sensor.writes = []
+    sensor.async_write_ha_state = lambda: sensor.writes.append(sensor.native_value)
+    return sensor
+
+def publish(manager, clock, seconds: float, water_temperature_f: float) -> None:
+    clock.now += seconds
+    manager.data = device_status(water_temperature_f)
+    manager.async_update_listeners()
+
+def test_small_changes_are_suppressed_and_counted(manager, monotonic):
+    sensor = water_sensor(manager)
+    manager.async_add_listener(sensor._handle_coordinator_update)
+
+    publish(manager, monotonic, 0, 72)
+    for step in range(5):
+        publish(manager, monotonic, 60, 72 + (0.25 if step % 2 else -0.25))
+
+    assert sensor.writes == [72]
+    assert manager.suppressed_writes == {"water_temperature": 5}
+
+def test_changes_wait_for_the_sensors_minimum_interval(manager, monotonic):
+    sensor = water_sensor(manager)
+    manager.async_add_listener(sensor._handle_coordinator_update)
+
+    publish(manager, monotonic, 0, 72)
+    publish(manager, monotonic, 30, 75)
+    publish(manager, monotonic, 30, 75)
+
+    assert sensor.writes == [72, 75]
+    assert manager.suppressed_writes == {"water_temperature": 1}
+
+def test_heartbeat_write_after_the_maximum_interval(manager, monotonic):
+    sensor = water_sensor(manager)
+    manager.async_add_listener(sensor._handle_coordinator_update)
+
+    publish(manager, monotonic, 0, 72)
+    for _ in range(9):
+        publish(manager, monotonic, 60, 72.25)
+    publish(manager, monotonic, 60, 72.25)
+
+    assert sensor.writes == [72, 72.25]
+
+def test_availability_change_forces_a_write(manager, monotonic):
+    sensor = water_sensor(manager)
+    manager.async_add_listener(sensor._handle_coordinator_update)
+
+    publish(manager, monotonic, 0, 72)
+    manager.last_update_success = False
+    publish(manager, monotonic, 1, 72)
+    manager.last_update_success = True
+    publish(manager, monotonic, 1, 72)
+
+    assert sensor.writes == [72, 72, 72]
+    assert manager.suppressed_writes == {}
+
+def test_intervals_are_per_sensor(manager):
+    manager.min_publish_intervals = {"environment_humidity": 120}
+    manager.max_publish_intervals = {"environment_humidity": 1800}
+    sensor = water_sensor(manager)
+
+    assert sensor._min_publish_interval == 0
+    assert sensor._max_publish_interval == 900
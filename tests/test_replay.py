@@ -0,0 +1,69 @@
+"""Replay a night of API traffic, 429s and 503s included, through the update manager."""
+from custom_components.sleepme_thermostat.update_manager import SleepMeUpdateManager
+from custom_components.sleepme_thermostat.const import API_URL
+from .common import DEVICE_ID, device_status, interaction, replay_api
+
+POLL_INTERVAL = 60
+NIGHT_POLLS = 8 * 60
+
+def night_cassette(outages: dict) -> list:
+    """A poll per minute for a night, with the status codes in ``outages`` keyed by poll index."""
+    return [
+        interaction(outages[index]) if index in outages else interaction(200, device_status(60 + index % 10))
+        for index in range(NIGHT_POLLS)
+    ]
+
+async def replay_night(hass, clock, outages: dict) -> tuple:
+    """Poll once per interval through the cassette. Returns the manager, transport and per-poll samples."""
+    api, transport = replay_api(night_cassette(outages), clock)
+    manager = SleepMeUpdateManager(hass, API_URL, "test-token", DEVICE_ID, api=api)
+    samples = []
+    for _ in range(NIGHT_POLLS):
+        await manager.async_refresh()
+        samples.append((manager.data, manager.data_age))
+        clock.advance(POLL_INTERVAL)
+    await manager.async_shutdown()
+    return manager, transport, samples
+
+async def test_clean_night_polls_once_per_interval(hass, clock):
+    manager, transport, samples = await replay_night(hass, clock, {})
+
+    assert transport.request_count == NIGHT_POLLS
+    assert transport.remaining == 0
+    assert manager.client.api.limiter.wait_count == 0
+    assert all(age == 0 for _, age in samples)
+
+async def test_outages_serve_last_valid_status(hass, clock):
+    # A burst of rate limiting, then a longer server outage
+    outages = {**{index: 429 for index in range(100, 103)}, **{index: 503 for index in range(300, 330)}}
+    manager, transport, samples = await replay_night(hass, clock, outages)
+
+    # Polls never retry, so failures cost no extra requests and no backoff
+    assert transport.request_count == NIGHT_POLLS
+    assert clock.slept == 0
+    assert manager.client.api.limiter.wait_count == 0
+
+    # Failed polls keep the last good snapshot and report how old it is
+    last_good = samples[299][0]
+    for offset in range(30):
+        data, age = samples[300 + offset]
+        assert data == last_good
+        assert age == POLL_INTERVAL * (offset + 1)
+    assert samples[99][0] == samples[102][0]
+    assert samples[102][1] == POLL_INTERVAL * 3
+
+    # The first good poll after the outage is fresh again
+    assert samples[330][1] == 0
+    assert samples[330][0]["status"]["water_temperature_f"] == 60 + 330 % 10
+
+async def test_outage_before_first_success_has_no_data_age(hass, clock):
+    api, _ = replay_api([interaction(503), interaction(200, device_status())], clock)
+    manager = SleepMeUpdateManager(hass, API_URL, "test-token", DEVICE_ID, api=api)
+
+    await manager.async_refresh()
+    assert manager.data == {"status": {}, "control": {}, "about": {}}
+    assert manager.data_age is None
+
+    await manager.async_refresh()
+    assert manager.data["status"]["water_temperature_f"] == 72
+    await manager.async_shutdown()
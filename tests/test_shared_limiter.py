@@ -0,0 +1,128 @@
+"""Several processes sharing one SqliteRateLimiter database stay within the global and per-instance limits."""
+import asyncio
+import multiprocessing
+import time
+from custom_components.sleepme_thermostat.cassette import ReplayTransport
+from custom_components.sleepme_thermostat.const import API_URL
+from custom_components.sleepme_thermostat.shared_limiter import SqliteRateLimiter
+from custom_components.sleepme_thermostat.sleepme_api import SleepMeAPI
+
+MAX_REQUESTS = 9
+INTERVAL = 1.0  # seconds, short so the test runs in a few seconds
+DURATION = 3.0  # seconds
+# The quotas add up to more than the budget, so the global limit binds, but the other
+# instances' quotas always leave instance-a a slot, so it cannot be starved
+QUOTAS = {"instance-a": 3, "instance-b": 4, "instance-c": 4}
+# Requests are timestamped when they reach the transport, shortly after their slot was claimed
+TRANSPORT_SLACK = 0.05  # seconds
+
+class _RecordingClock:
+    """Wall clock that remembers its last reading, i.e. the timestamp of the last claimed slot."""
+
+    def __init__(self):
+        self.last = None
+
+    def __call__(self) -> float:
+        self.last = time.time()
+        return self.last
+
+def _claim_slots(path: str, instance: str, quota, ready, start, results) -> None:
+    """Claim slots as fast as the limiter allows and report when each was granted."""
+    clock = _RecordingClock()
+    limiter = SqliteRateLimiter(
+        path, "shared-token", instance, MAX_REQUESTS, INTERVAL, instance_quota=quota, clock=clock
+    )
+    ready.put(instance)
+    start.wait()
+
+    granted = []
+    deadline = time.time() + DURATION
+    while time.time() < deadline:
+        wait = limiter.try_acquire()
+        if wait <= 0:
+            granted.append(clock.last)
+        else:
+            time.sleep(wait)
+    results.put((instance, granted))
+
+class _WallClock:
+    """Real time for the replay transport, which otherwise runs on a virtual clock."""
+
+    def time(self) -> float:
+        return time.time()
+
+    async def sleep(self, seconds: float):
+        await asyncio.sleep(seconds)
+
+async def _async_poll(path: str, instance: str, quota, deadline: float) -> list:
+    device_path = f"/v1/devices/{instance}"
+    transport = ReplayTransport(
+        [{"method": "GET", "path": device_path, "status": 200, "latency": 0, "response": {"status": {}}}] * 100,
+        _WallClock(),
+    )
+    limiter = SqliteRateLimiter(path, "shared-token", instance, MAX_REQUESTS, INTERVAL, instance_quota=quota)
+    api = SleepMeAPI(API_URL, "shared-token", transport=transport, limiter=limiter)
+    try:
+        while time.time() < deadline:
+            assert await api.api_request("GET", f"devices/{instance}") == {"status": {}}
+    finally:
+        await api.close()
+    return [timestamp for timestamp, _method, _path in transport.requests]
+
+def _poll_device(path: str, instance: str, quota, ready, start, results) -> None:
+    """Poll a device through SleepMeAPI as fast as the shared limiter allows and report when each request was sent."""
+    ready.put(instance)
+    start.wait()
+    results.put((instance, asyncio.run(_async_poll(path, instance, quota, time.time() + DURATION))))
+
+def _run_processes(target, path: str) -> dict:
+    """Run ``target`` in one process per instance, started together, and return what each reported."""
+    context = multiprocessing.get_context("spawn")
+    ready, results, start = context.Queue(), context.Queue(), context.Event()
+    processes = [
+        context.Process(target=target, args=(path, instance, quota, ready, start, results))
+        for instance, quota in QUOTAS.items()
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for _ in processes:
+            ready.get(timeout=60)
+        start.set()
+        return dict(results.get(timeout=60) for _ in processes)
+    finally:
+        for process in processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.kill()
+
+def _assert_window(timestamps: list, limit: int, slack: float = 1e-6) -> None:
+    """No more than ``limit`` timestamps may fall within any INTERVAL."""
+    timestamps = sorted(timestamps)
+    for earlier, later in zip(timestamps, timestamps[limit:]):
+        assert later - earlier >= INTERVAL - slack
+
+def test_processes_share_one_budget(tmp_path):
+    granted = _run_processes(_claim_slots, str(tmp_path / "limiter.sqlite"))
+
+    everything = [timestamp for timestamps in granted.values() for timestamp in timestamps]
+    _assert_window(everything, MAX_REQUESTS)
+    for instance, quota in QUOTAS.items():
+        _assert_window(granted[instance], quota)
+
+    # The budget is actually used, and every instance gets a share
+    assert len(everything) >= MAX_REQUESTS * int(DURATION / INTERVAL)
+    assert all(granted[instance] for instance in QUOTAS)
+    assert len(granted["instance-a"]) <= QUOTAS["instance-a"] * (int(DURATION / INTERVAL) + 1)
+
+def test_api_clients_in_processes_share_one_budget(tmp_path):
+    sent = _run_processes(_poll_device, str(tmp_path / "limiter.sqlite"))
+
+    everything = [timestamp for timestamps in sent.values() for timestamp in timestamps]
+    _assert_window(everything, MAX_REQUESTS, TRANSPORT_SLACK)
+    for instance, quota in QUOTAS.items():
+        _assert_window(sent[instance], quota, TRANSPORT_SLACK)
+
+    assert len(everything) >= MAX_REQUESTS * int(DURATION / INTERVAL)
+    assert all(sent[instance] for instance in QUOTAS)
+    assert len(sent["instance-a"]) <= QUOTAS["instance-a"] * (int(DURATION / INTERVAL) + 1)
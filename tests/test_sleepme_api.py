@@ -0,0 +1,81 @@
+"""Tests for SleepMeAPI error handling and the rate limiter, on a virtual clock."""
+import pytest
+from custom_components.sleepme_thermostat.sleepme_api import RateLimiter
+from .common import DEVICE_ID, device_status, interaction, replay_api
+
+ENDPOINT = f"devices/{DEVICE_ID}"
+
+async def test_429_backs_off_and_retries(clock):
+    api, transport = replay_api([interaction(429), interaction(200, device_status())], clock)
+
+    result = await api.api_request("GET", ENDPOINT, retries=2)
+
+    assert result == device_status()
+    assert transport.request_count == 2
+    # 30s doubled once for the first of two retries
+    assert clock.slept == 60
+
+async def test_503_backs_off_for_less_than_429(clock):
+    api, transport = replay_api([interaction(503), interaction(200, device_status())], clock)
+
+    await api.api_request("GET", ENDPOINT, retries=1)
+
+    assert transport.request_count == 2
+    assert clock.slept == 10
+
+async def test_server_errors_return_empty_after_retries(clock):
+    api, transport = replay_api([interaction(503)] * 3, clock)
+
+    assert await api.api_request("GET", ENDPOINT, retries=2) == {}
+    assert transport.request_count == 3
+    assert clock.slept == 20 + 10
+
+async def test_no_retries_returns_empty_without_waiting(clock):
+    api, transport = replay_api([interaction(429)], clock)
+
+    assert await api.api_request("GET", ENDPOINT, retries=0) == {}
+    assert transport.request_count == 1
+    assert clock.slept == 0
+
+async def test_forbidden_raises_invalid_token(clock):
+    api, transport = replay_api([interaction(403)], clock)
+
+    with pytest.raises(ValueError, match="invalid_token"):
+        await api.api_request("GET", ENDPOINT, retries=2)
+    assert transport.request_count == 1
+
+async def test_connection_error_raises_cannot_connect(clock):
+    api, _ = replay_api([interaction(error="ConnectError")], clock)
+
+    with pytest.raises(ValueError, match="cannot_connect"):
+        await api.api_request("GET", ENDPOINT, retries=2)
+
+async def test_timeout_is_retried(clock):
+    api, transport = replay_api([interaction(error="timeout"), interaction(200, device_status())], clock)
+
+    assert await api.api_request("GET", ENDPOINT, retries=1) == device_status()
+    assert transport.request_count == 2
+
+async def test_rate_limiter_waits_for_the_window(clock):
+    limiter = RateLimiter(9, 60, clock=clock.time, sleep=clock.sleep)
+
+    waits = [await limiter.acquire() for _ in range(12)]
+
+    # The tenth request waits for the window to slide; the burst's slots then free up together
+    assert waits[:9] == [0.0] * 9
+    assert waits[9] == pytest.approx(60)
+    assert waits[10:] == [0.0, 0.0]
+    assert limiter.wait_count == 1
+    assert limiter.total_wait == pytest.approx(60)
+    assert clock.time() - 1_700_000_000.0 == pytest.approx(60)
+
+async def test_rate_limiter_spaces_replayed_requests(clock):
+    api, transport = replay_api([interaction(200, device_status())] * 18, clock)
+
+    for _ in range(18):
+        await api.api_request("GET", ENDPOINT, retries=0)
+
+    times = [moment for moment, _, _ in transport.requests]
+    # No ten requests may fall within any minute
+    assert all(later - earlier >= 60 for earlier, later in zip(times, times[9:]))
+    assert api.limiter.wait_count == 1
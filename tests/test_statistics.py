@@ -0,0 +1,89 @@
+"""Long-term statistics are rolled up per hour and survive a reload in the middle of one."""
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+import pytest
+from custom_components.sleepme_thermostat import statistics
+from custom_components.sleepme_thermostat.statistics import SleepMeStatisticsAggregator
+from .common import DEVICE_ID
+
+HOUR = datetime(2024, 3, 1, 10, 0, tzinfo=timezone.utc)
+DEVICE_DATA = {"device_id": DEVICE_ID, "device_type": "sleep_pad", "name": "Pad"}
+
+@pytest.fixture
+def imported(monkeypatch):
+    """Statistics handed to the recorder, as (statistic id, [StatisticData])."""
+    calls = []
+    monkeypatch.setattr(
+        statistics, "async_add_external_statistics",
+        lambda hass, metadata, data: calls.append((metadata["statistic_id"], data)),
+    )
+    return calls
+
+class FakeCoordinator(SimpleNamespace):
+    def __init__(self):
+        super().__init__(values={}, listeners=[])
+
+    def register_value(self, key, section, field, value_fn=None):
+        pass
+
+    def async_add_listener(self, update_callback):
+        self.listeners.append(update_callback)
+        return lambda: self.listeners.remove(update_callback)
+
+def poll(coordinator, value) -> None:
+    coordinator.values["water_temperature"] = value
+    for update_callback in list(coordinator.listeners):
+        update_callback()
+
+def feed(freezer, coordinator, minutes, value_of) -> None:
+    for minute in minutes:
+        freezer.move_to(HOUR + timedelta(minutes=minute))
+        poll(coordinator, value_of(minute))
+
+async def test_hour_is_rolled_up_into_one_statistic(hass, freezer, imported):
+    coordinator = FakeCoordinator()
+    aggregator = SleepMeStatisticsAggregator(hass, coordinator, DEVICE_DATA)
+    await aggregator.async_start()
+
+    feed(freezer, coordinator, range(60), lambda minute: 60 + minute % 10)
+    aggregator._handle_hour(HOUR + timedelta(hours=1, minutes=1))
+
+    (statistic_id, data), = imported
+    assert statistic_id == "sleepme_thermostat:test_device_water_temperature"
+    assert [(row["start"], row["min"], row["max"]) for row in data] == [(HOUR, 60, 69)]
+    assert data[0]["mean"] == pytest.approx(64.5)
+    await aggregator.async_stop()
+
+async def test_reload_mid_hour_keeps_the_whole_hour(hass, hass_storage, freezer, imported):
+    coordinator = FakeCoordinator()
+    aggregator = SleepMeStatisticsAggregator(hass, coordinator, DEVICE_DATA)
+    await aggregator.async_start()
+    feed(freezer, coordinator, range(30), lambda minute: 50)
+    await aggregator.async_stop()
+
+    # The unfinished hour is stored rather than imported
+    assert imported == []
+    assert statistics.storage_key(DEVICE_ID) in hass_storage
+
+    coordinator = FakeCoordinator()
+    reloaded = SleepMeStatisticsAggregator(hass, coordinator, DEVICE_DATA)
+    await reloaded.async_start()
+    feed(freezer, coordinator, range(30, 60), lambda minute: 70)
+    reloaded._handle_hour(HOUR + timedelta(hours=1, minutes=1))
+
+    (_, data), = imported
+    assert (data[0]["min"], data[0]["max"]) == (50, 70)
+    assert data[0]["mean"] == pytest.approx(60)
+    await reloaded.async_stop()
+
+async def test_non_numeric_values_are_skipped(hass, freezer, imported):
+    coordinator = FakeCoordinator()
+    aggregator = SleepMeStatisticsAggregator(hass, coordinator, DEVICE_DATA)
+    await aggregator.async_start()
+
+    feed(freezer, coordinator, range(3), lambda minute: [None, True, 65][minute])
+    aggregator._handle_hour(HOUR + timedelta(hours=1, minutes=1))
+
+    (_, data), = imported
+    assert (data[0]["mean"], data[0]["min"], data[0]["max"]) == (65, 65, 65)
+    await aggregator.async_stop()